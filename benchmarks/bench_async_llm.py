@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Benchmark: 50 simultaneous chats against AsyncTwiNailzAI.
+
+Uses a fake OpenAI client with a fixed latency so the run needs no API key.
+With the async path the whole batch should finish in roughly one latency.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fake_openai import FakeAsyncOpenAI  # noqa: E402
+from llm_limiter import LLMAdmission  # noqa: E402
+from openai_handler import AsyncTwiNailzAI  # noqa: E402
+
+LLM_LATENCY = 0.5
+CHATS = 50
+
+
+async def main():
+    # Admission sized to the batch so only the async path is measured
+    nail_ai = AsyncTwiNailzAI(
+        client=FakeAsyncOpenAI(LLM_LATENCY),
+        admission=LLMAdmission(max_concurrency=CHATS),
+    )
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(nail_ai.get_nail_recommendation(f"wedding nails #{i}") for i in range(CHATS))
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"{CHATS} chats, LLM latency {LLM_LATENCY:.2f}s")
+    print(f"async total: {elapsed:.2f}s (serial would be {CHATS * LLM_LATENCY:.2f}s)")
+    assert elapsed < LLM_LATENCY * 2, "chats did not overlap"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Benchmark: concurrent save_conversation throughput on AsyncNailDatabase.
+
+Compares the group-commit writer on one long-lived connection with the
+original pattern of a fresh aiosqlite connection and commit per row. The
+baseline runs rows one at a time: run concurrently it fails with
+"database is locked".
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import aiosqlite
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database_async import AsyncNailDatabase  # noqa: E402
+
+ROWS = 5000
+BASELINE_ROWS = 500
+
+
+async def per_connection_save(db_path, user_id):
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute(
+            "INSERT INTO conversations (user_id, message, response, personality) VALUES (?, ?, ?, ?)",
+            (user_id, "wedding nails?", "Pearl Veil", "lumi"),
+        )
+        await db.commit()
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_path = os.path.join(tmp, "baseline.db")
+        setup = AsyncNailDatabase(baseline_path)
+        await setup.init_database()
+        await setup.close()
+        start = time.perf_counter()
+        for i in range(BASELINE_ROWS):
+            await per_connection_save(baseline_path, i % 100)
+        baseline = BASELINE_ROWS / (time.perf_counter() - start)
+
+        db = AsyncNailDatabase(os.path.join(tmp, "grouped.db"))
+        await db.init_database()
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                db.save_conversation(i % 100, "wedding nails?", "Pearl Veil", "lumi")
+                for i in range(ROWS)
+            )
+        )
+        await db.flush()
+        grouped = ROWS / (time.perf_counter() - start)
+        saved = await db.get_user_stats(0)
+        await db.close()
+
+    print(f"connection per row: {baseline:8.0f} rows/s")
+    print(f"group commit:       {grouped:8.0f} rows/s ({grouped / baseline:.1f}x)")
+    assert saved == ROWS // 100
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Benchmark: CacheManager's SQLite store vs the old pickle file per key.
+
+Writes 100k keys, then reads them all back through a fresh manager so
+every read misses memory and hits the persistent tier, as after a
+restart. The pickle baseline reproduces the original implementation.
+"""
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tech_stack import CacheManager  # noqa: E402
+
+KEYS = 100000
+BATCH = 1000
+
+
+class PickleFileCache:
+    """The original store: one pickle file per key"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _file(self, key):
+        return os.path.join(self.cache_dir, f"{hashlib.md5(key.encode()).hexdigest()}.pkl")
+
+    def set(self, key, data, ttl_minutes=60):
+        with open(self._file(key), "wb") as f:
+            pickle.dump({"data": data, "expires": datetime.now() + timedelta(minutes=ttl_minutes)}, f)
+
+    def get(self, key):
+        cache_file = self._file(key)
+        if os.path.exists(cache_file):
+            with open(cache_file, "rb") as f:
+                cached = pickle.load(f)
+            if datetime.now() < cached["expires"]:
+                return cached["data"]
+        return None
+
+
+def value(i):
+    return {"title": f"Trend {i}", "colors": ["chrome", "pearl"], "score": i / 7}
+
+
+def rate(label, count, fn):
+    start = time.perf_counter()
+    fn()
+    per_second = count / (time.perf_counter() - start)
+    print(f"{label:<36}{per_second:>12.0f} keys/s")
+    return per_second
+
+
+def main():
+    keys = [f"trend:{i}" for i in range(KEYS)]
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_dir = os.path.join(tmp, "pickle")
+        os.makedirs(pickle_dir)
+        legacy = PickleFileCache(pickle_dir)
+        rate("pickle files: set", KEYS, lambda: [legacy.set(k, value(i)) for i, k in enumerate(keys)])
+        rate("pickle files: cold get", KEYS, lambda: [legacy.get(k) for k in keys])
+        print(f"{'pickle files: files on disk':<36}{len(os.listdir(pickle_dir)):>12}")
+
+        sqlite_dir = os.path.join(tmp, "sqlite")
+        cache = CacheManager(sqlite_dir)
+        rate("sqlite: set", KEYS, lambda: [cache.set(k, value(i)) for i, k in enumerate(keys)])
+        cache.close()
+        cold = CacheManager(sqlite_dir)
+        rate("sqlite: cold get", KEYS, lambda: [cold.get(k) for k in keys])
+        cold.close()
+
+        batched_dir = os.path.join(tmp, "batched")
+        cache = CacheManager(batched_dir)
+        rate(
+            f"sqlite: set_many x{BATCH}",
+            KEYS,
+            lambda: [
+                cache.set_many({k: value(i) for i, k in enumerate(keys[s : s + BATCH], s)})
+                for s in range(0, KEYS, BATCH)
+            ],
+        )
+        cache.close()
+        cold = CacheManager(batched_dir)
+        hits = 0
+
+        def get_batches():
+            nonlocal hits
+            for s in range(0, KEYS, BATCH):
+                hits += len(cold.get_many(keys[s : s + BATCH]))
+
+        rate(f"sqlite: cold get_many x{BATCH}", KEYS, get_batches)
+        cold.close()
+        assert hits == KEYS
+
+        capped = CacheManager(os.path.join(tmp, "capped"), max_bytes=1024 * 1024)
+        capped.set_many({k: value(i) for i, k in enumerate(keys)})
+        print(f"{'sqlite: bytes under a 1 MiB cap':<36}{capped.store.total_bytes:>12}")
+        assert capped.store.total_bytes <= 1024 * 1024
+        capped.close()
+
+
+if __name__ == "__main__":
+    main()
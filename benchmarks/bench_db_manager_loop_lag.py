@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark: event-loop lag while DatabaseManager runs slow queries.
+
+A ticker task sleeps 5 ms in a loop and records the worst gap between
+wake-ups while slow queries run. The baseline runs the same queries with
+blocking sqlite3 calls on the loop thread, as DatabaseManager used to;
+the executor-backed manager should keep the loop responsive.
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tech_stack import DatabaseManager  # noqa: E402
+
+TICK = 0.005
+QUERIES = 4
+# A recursive CTE that keeps SQLite busy for a few hundred milliseconds
+SLOW_QUERY = """
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 2000000)
+    SELECT SUM(i) FROM n
+"""
+MAX_LAG = 0.1
+
+
+async def ticker(stop: asyncio.Event) -> float:
+    worst = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(TICK)
+        now = time.perf_counter()
+        worst = max(worst, now - last - TICK)
+        last = now
+    return worst
+
+
+async def measure(run_query) -> tuple:
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop))
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    await asyncio.gather(*(run_query() for _ in range(QUERIES)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return await tick, elapsed
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "lag.db")
+        manager = DatabaseManager(db_path)
+
+        async def blocking():
+            with sqlite3.connect(db_path) as conn:
+                return conn.execute(SLOW_QUERY).fetchone()
+
+        async def pooled():
+            return await manager.execute_query(SLOW_QUERY, fetch="one")
+
+        blocking_lag, blocking_time = await measure(blocking)
+        pooled_lag, pooled_time = await measure(pooled)
+
+        rows = [(f"metric_{i % 10}", float(i)) for i in range(20000)]
+        await manager.execute_many(
+            "INSERT INTO analytics (metric_name, metric_value) VALUES (?, ?)", rows
+        )
+        streamed = 0
+        async for _ in manager.iter_rows("SELECT * FROM analytics"):
+            streamed += 1
+        manager.close()
+
+    print(f"blocking on loop: worst loop lag {blocking_lag * 1000:7.1f} ms, {blocking_time:.2f}s total")
+    print(f"thread pool:      worst loop lag {pooled_lag * 1000:7.1f} ms, {pooled_time:.2f}s total")
+    print(f"execute_many + iter_rows round trip: {streamed} rows")
+    assert pooled_lag < MAX_LAG, pooled_lag
+    assert streamed == len(rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
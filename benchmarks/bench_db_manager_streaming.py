@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Benchmark: DatabaseManager bulk inserts and chunked streaming exports.
+
+Inserts interactions with execute_many versus one execute_query per row,
+then exports the table to CSV twice: once via fetch="all" and once via
+iter_chunks. Python heap peaks come from tracemalloc; the chunked export
+should stay flat regardless of table size.
+"""
+import asyncio
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tech_stack import DatabaseManager  # noqa: E402
+
+ROWS = 300000
+PER_ROW_SAMPLE = 2000
+BATCH = 10000
+CHUNK = 1000
+INSERT = """
+    INSERT INTO interactions (user_id, request_text, request_type, response_text, personality_used)
+    VALUES (?, ?, ?, ?, ?)
+"""
+EXPORT = "SELECT id, user_id, request_text, request_type, response_text, timestamp FROM interactions"
+
+
+def interaction(i):
+    return (i % 5000, f"wedding nails #{i}?", "occasion", "Pearl Veil with gold foil tips", "lumi")
+
+
+async def export(path, rows_source):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        exported = await rows_source(writer)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return exported, elapsed, peak
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "stream.db"))
+
+        start = time.perf_counter()
+        for i in range(PER_ROW_SAMPLE):
+            await db.execute_query(INSERT, interaction(i))
+        per_row = PER_ROW_SAMPLE / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for offset in range(PER_ROW_SAMPLE, ROWS, BATCH):
+            await db.execute_many(
+                INSERT, (interaction(i) for i in range(offset, min(offset + BATCH, ROWS)))
+            )
+        batched = (ROWS - PER_ROW_SAMPLE) / (time.perf_counter() - start)
+
+        async def fetch_all(writer):
+            rows = await db.execute_query(EXPORT, fetch="all")
+            writer.writerows(rows)
+            return len(rows)
+
+        async def chunked(writer):
+            exported = 0
+            async for rows in db.iter_chunks(EXPORT, chunk_size=CHUNK):
+                writer.writerows(rows)
+                exported += len(rows)
+            return exported
+
+        all_rows, all_time, all_peak = await export(os.path.join(tmp, "all.csv"), fetch_all)
+        chunk_rows, chunk_time, chunk_peak = await export(os.path.join(tmp, "chunked.csv"), chunked)
+        db.close()
+
+    print(f"insert, execute_query per row: {per_row:10.0f} rows/s")
+    print(f"insert, execute_many x{BATCH}:  {batched:10.0f} rows/s ({batched / per_row:.0f}x)")
+    print(f"export fetch='all':   {all_rows} rows in {all_time:.2f}s, peak {all_peak / 2**20:7.1f} MiB")
+    print(f"export iter_chunks:   {chunk_rows} rows in {chunk_time:.2f}s, peak {chunk_peak / 2**20:7.1f} MiB")
+    assert all_rows == chunk_rows == ROWS
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Benchmark: CacheManager memory-tier eviction policies and expiry cost.
+
+Hit rates come from a skewed (Pareto) key stream mixed with one-off
+scan keys, the pattern that flushes a plain LRU. Expiry compares the old
+full scan over every TTL with the timer wheel, when 1% of 100k entries are due.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from memory_cache import POLICIES, MemoryCache  # noqa: E402
+
+CAPACITY = 1000
+REQUESTS = 200000
+SCAN_SHARE = 0.3
+ENTRIES = 100000
+DUE = ENTRIES // 100
+
+
+def workload(seed=7):
+    rng = random.Random(seed)
+    for i in range(REQUESTS):
+        if rng.random() < SCAN_SHARE:
+            yield ("scan", i)
+        else:
+            yield ("hot", int(rng.paretovariate(0.8)))
+
+
+def hit_rates():
+    expires = time.time() + 3600
+    print(f"{'policy':<10}{'hit rate':>10}{'evictions':>12}{'rejections':>12}")
+    for policy in POLICIES:
+        cache = MemoryCache(CAPACITY, policy)
+        for key in workload():
+            if cache.get(key) is None:
+                cache.set(key, True, expires)
+        stats = cache.stats
+        rate = stats["hits"] / (stats["hits"] + stats["misses"])
+        print(f"{policy:<10}{rate:>10.1%}{stats['evictions']:>12}{stats['rejections']:>12}")
+
+
+def expiry_cost():
+    now = time.time()
+    ttls = {i: now + (1 if i < DUE else 3600) for i in range(ENTRIES)}
+
+    start = time.perf_counter()
+    expired = [k for k, ttl in ttls.items() if now + 2 >= ttl]
+    for key in expired:
+        del ttls[key]
+    scan = time.perf_counter() - start
+
+    cache = MemoryCache(ENTRIES)
+    for i in range(ENTRIES):
+        cache.set(i, i, now + (1 if i < DUE else 3600))
+    start = time.perf_counter()
+    removed = cache.expire(now + 2)
+    wheel = time.perf_counter() - start
+
+    assert removed == len(expired) == DUE
+    print(f"expire {DUE} of {ENTRIES}: full scan {scan * 1000:.1f} ms, timer wheel {wheel * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    hit_rates()
+    expiry_cost()
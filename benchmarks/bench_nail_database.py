@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmark: NailDatabase pooled WAL connections vs a connection per call.
+
+The per-call baseline reproduces the original pattern: open, execute,
+commit and close a default-journal connection for every operation.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import NailDatabase  # noqa: E402
+
+OPS = 2000
+
+
+class PerCallNailDatabase(NailDatabase):
+    """The original open-per-call access pattern"""
+
+    def _run(self, query, params, fetch=False):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        result = cursor.fetchone() if fetch else None
+        conn.commit()
+        conn.close()
+        return result
+
+    def add_user_sync(self, user_id, username=None, first_name=None):
+        self._run(
+            "INSERT OR REPLACE INTO users (user_id, username, first_name, last_active) VALUES (?, ?, ?, ?)",
+            (user_id, username, first_name, datetime.now()),
+        )
+
+    def get_user_sync(self, user_id):
+        return self._run("SELECT * FROM users WHERE user_id = ?", (user_id,), True)
+
+    def save_conversation_sync(self, user_id, message, response, personality):
+        self._run(
+            "INSERT INTO conversations (user_id, message, response, personality) VALUES (?, ?, ?, ?)",
+            (user_id, message, response, personality),
+        )
+
+
+def run(db):
+    results = {}
+    for name, op in [
+        ("add_user_sync", lambda i: db.add_user_sync(i % 500, f"user{i}", "Nail")),
+        ("get_user_sync", lambda i: db.get_user_sync(i % 500)),
+        (
+            "save_conversation_sync",
+            lambda i: db.save_conversation_sync(i % 500, "wedding nails?", "Pearl Veil", "lumi"),
+        ),
+    ]:
+        start = time.perf_counter()
+        for i in range(OPS):
+            op(i)
+        results[name] = OPS / (time.perf_counter() - start)
+    return results
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        per_call = run(PerCallNailDatabase(os.path.join(tmp, "per_call.db")))
+        pooled_db = NailDatabase(os.path.join(tmp, "pooled.db"))
+        pooled = run(pooled_db)
+        pooled_db.close()
+
+    print(f"{'operation':<24}{'per-call ops/s':>16}{'pooled ops/s':>16}{'speedup':>10}")
+    for name in per_call:
+        print(
+            f"{name:<24}{per_call[name]:>16.0f}{pooled[name]:>16.0f}"
+            f"{pooled[name] / per_call[name]:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
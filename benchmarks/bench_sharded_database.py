@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Benchmark: write throughput of sharded vs single-file storage.
+
+Async: concurrent save_conversation calls through the group-commit writer,
+one writer per shard. Sync: a thread per simulated handler committing each
+row, where a single file serializes every writer on its lock.
+
+With WAL and synchronous=NORMAL a commit rarely waits on the disk, so on
+one machine both paths are bound by Python CPU time and extra shards add
+overhead rather than throughput. Shards pay off when commits are I/O
+bound (slow or network disks, synchronous=FULL), which is why sharding
+is opt-in via DATABASE_SHARDS.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database_sharded import (  # noqa: E402
+    ShardedNailDatabase,
+    create_async_database,
+)
+from database import NailDatabase  # noqa: E402
+
+ASYNC_ROWS = 20000
+SYNC_ROWS = 4000
+THREADS = 8
+USERS = 1000
+SHARD_COUNTS = [1, 2, 4, 8]
+
+
+async def async_rows_per_second(db_path, shards):
+    db = create_async_database(db_path, shards)
+    await db.init_database()
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            db.save_conversation(i % USERS, "wedding nails?", "Pearl Veil", "lumi")
+            for i in range(ASYNC_ROWS)
+        )
+    )
+    await db.flush()
+    elapsed = time.perf_counter() - start
+    totals = await db.get_totals()
+    await db.close()
+    assert totals["interactions"] == ASYNC_ROWS, totals
+    return ASYNC_ROWS / elapsed
+
+
+def sync_rows_per_second(db_path, shards):
+    db = ShardedNailDatabase(db_path, shards) if shards > 1 else NailDatabase(db_path)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        list(
+            pool.map(
+                lambda i: db.save_conversation_sync(i % USERS, "wedding nails?", "Pearl Veil", "lumi"),
+                range(SYNC_ROWS),
+            )
+        )
+    elapsed = time.perf_counter() - start
+    totals = db.get_totals_sync()
+    db.close()
+    assert totals["interactions"] == SYNC_ROWS, totals
+    return SYNC_ROWS / elapsed
+
+
+def main():
+    print(f"{'shards':>6}{'async rows/s':>16}{'sync rows/s':>16}")
+    for shards in SHARD_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            async_rate = asyncio.run(async_rows_per_second(os.path.join(tmp, "async.db"), shards))
+            sync_rate = sync_rows_per_second(os.path.join(tmp, "sync.db"), shards)
+        print(f"{shards:>6}{async_rate:>16.0f}{sync_rate:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark: TrendScraper latency as sources are added.
+
+A local aiohttp server answers each source after a fixed delay. The
+baseline fetches sources one after another with requests.Session, as the
+scraper used to; the pooled aiohttp scraper should take about one delay
+no matter how many sources there are, and a hung source is cut off at its
+own timeout. Every test source is on 127.0.0.1, so limit_per_host is
+raised to stand in for real sources on separate hosts.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import requests
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tech_stack import CacheManager, TrendScraper, TrendSource, parse_nail_pro  # noqa: E402
+
+DELAY = 0.3
+PAGE = b'<article class="trend-item"><h2>Chrome Glaze</h2><p>Mirror-shine tips</p></article>'
+
+
+async def page(request):
+    await asyncio.sleep(float(request.query.get("delay", DELAY)))
+    return web.Response(body=PAGE, content_type="text/html")
+
+
+def sources(port, count, hung=False):
+    found = {
+        f"source{i}": TrendSource(f"http://127.0.0.1:{port}/s{i}", parse_nail_pro, timeout=2)
+        for i in range(count)
+    }
+    if hung:
+        found["hung"] = TrendSource(
+            f"http://127.0.0.1:{port}/hung?delay=30", parse_nail_pro, timeout=0.5
+        )
+    return found
+
+
+def sequential(source_map):
+    session = requests.Session()
+    return {
+        name: parse_nail_pro(session.get(source.url, timeout=10).content)
+        for name, source in source_map.items()
+    }
+
+
+async def main():
+    app = web.Application()
+    app.router.add_get("/{name}", page)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    print(f"{'sources':>8}{'sequential':>14}{'aiohttp':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheManager(tmp)
+        for count in (2, 4, 8):
+            source_map = sources(port, count)
+            start = time.perf_counter()
+            await asyncio.to_thread(sequential, source_map)
+            blocking = time.perf_counter() - start
+
+            scraper = TrendScraper(cache, source_map, limit_per_host=count)
+            start = time.perf_counter()
+            trends = await scraper._scrape_all_trends()
+            pooled = time.perf_counter() - start
+            await scraper.close()
+            assert all(trends[name] for name in source_map)
+            print(f"{count:>8}{blocking:>13.2f}s{pooled:>11.2f}s")
+
+        scraper = TrendScraper(cache, sources(port, 4, hung=True), limit_per_host=5)
+        start = time.perf_counter()
+        trends = await scraper._scrape_all_trends()
+        elapsed = time.perf_counter() - start
+        await scraper.close()
+        cache.close()
+        print(f"4 sources + 1 hung (0.5s timeout): {elapsed:.2f}s, hung source returned {trends['hung']}")
+        assert elapsed < 1.0
+
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Benchmark: 200 simultaneous /trends requests share one upstream LLM call."""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fake_openai import FakeAsyncOpenAI  # noqa: E402
+from openai_handler import AsyncTwiNailzAI  # noqa: E402
+from tech_stack import CacheManager  # noqa: E402
+
+LLM_LATENCY = 0.5
+USERS = 200
+
+
+async def main():
+    client = FakeAsyncOpenAI(LLM_LATENCY)
+    cache = CacheManager(tempfile.mkdtemp())
+    nail_ai = AsyncTwiNailzAI(client=client, trends_cache=cache)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(nail_ai.get_nail_trends() for _ in range(USERS)))
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await nail_ai.get_nail_trends()
+    warm = time.perf_counter() - start
+
+    print(f"{USERS} concurrent /trends: {cold:.3f}s, upstream calls: {client.completions.calls}")
+    print(f"warm cache hit: {warm * 1000:.3f}ms")
+    assert client.completions.calls == 1, "requests were not coalesced"
+    assert len(set(results)) == 1
+
+    # Expire the fresh window: callers get the stale answer at once while
+    # a single background call refreshes it
+    for entry, _ in cache.memory.entries.values():
+        entry["fresh_until"] = time.time() - 1
+    start = time.perf_counter()
+    await asyncio.gather(*(nail_ai.get_nail_trends() for _ in range(USERS)))
+    stale = time.perf_counter() - start
+    await asyncio.sleep(LLM_LATENCY * 2)
+    print(f"{USERS} concurrent /trends on a stale entry: {stale * 1000:.3f}ms, upstream calls: {client.completions.calls}")
+    assert client.completions.calls == 2
+    assert cache.namespace_stats["llm"].stale_hits == USERS
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
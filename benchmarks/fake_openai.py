@@ -0,0 +1,24 @@
+"""Fake OpenAI clients with fixed latency so benchmarks need no API key."""
+import asyncio
+from types import SimpleNamespace
+
+
+class FakeCompletions:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def create(self, model, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        message = SimpleNamespace(content=f"Try chrome tips for: {messages[-1]['content']}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, latency: float = 0.5):
+        self.completions = FakeCompletions(latency)
+        self.chat = SimpleNamespace(completions=self.completions)
+
+    async def close(self):
+        pass
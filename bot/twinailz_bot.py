@@ -1,7 +1,11 @@
+import atexit
 import logging
+import queue
 import random
 import sqlite3
+import threading
 from datetime import datetime
+from pathlib import Path
 
 from telegram import Update
 from telegram.ext import (
@@ -19,6 +23,78 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class DatabaseWriter:
+    """Owns the only write connection; handlers enqueue, one thread commits"""
+
+    def __init__(self, db_path: str, max_batch: int = 500):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self._readers = threading.local()
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, query: str, params: tuple = ()):
+        """Queue a write; it is committed by the writer thread"""
+        self.queue.put((query, params))
+
+    def flush(self):
+        """Block until every queued write has been committed"""
+        self.queue.join()
+
+    def read(self, query: str, params: tuple = ()) -> list:
+        """Run a lookup on this thread's read-only connection"""
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True)
+            self._readers.conn = conn
+        return conn.execute(query, params).fetchall()
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.max_batch and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            writes = [item for item in batch if item is not None]
+            self._commit(conn, writes)
+            for _ in batch:
+                self.queue.task_done()
+            if batch[-1] is None:
+                conn.close()
+                return
+
+    def _commit(self, conn: sqlite3.Connection, writes: list):
+        """Commit a batch in one transaction, replaying singly if a write fails"""
+        try:
+            for query, params in writes:
+                conn.execute(query, params)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.warning(f"Batch commit failed, retrying writes singly: {e}")
+            for query, params in writes:
+                try:
+                    conn.execute(query, params)
+                    conn.commit()
+                except sqlite3.Error as row_error:
+                    conn.rollback()
+                    logger.error(f"Dropped write '{' '.join(query.split()[:3])}': {row_error}")
+
+    def close(self):
+        """Commit queued writes and stop the writer thread"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+
 class TwiNailzBot:
     def __init__(self, token: str):
         self.token = token
@@ -28,11 +104,10 @@ class TwiNailzBot:
 
     def init_database(self):
         """Initialize SQLite database for interaction logging"""
-        self.conn = sqlite3.connect("twinailz_data.db", check_same_thread=False)
-        cursor = self.conn.cursor()
+        self.db = DatabaseWriter("twinailz_data.db")
 
         # User interactions table
-        cursor.execute(
+        self.db.write(
             """
             CREATE TABLE IF NOT EXISTS interactions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -44,9 +119,12 @@ class TwiNailzBot:
             )
         """
         )
+        self.db.write(
+            "CREATE INDEX IF NOT EXISTS idx_interactions_user_time ON interactions (user_id, timestamp)"
+        )
 
         # User preferences table
-        cursor.execute(
+        self.db.write(
             """
             CREATE TABLE IF NOT EXISTS user_preferences (
                 user_id INTEGER PRIMARY KEY,
@@ -59,7 +137,8 @@ class TwiNailzBot:
         """
         )
 
-        self.conn.commit()
+        # Tables must exist before read-only connections can open the file
+        self.db.flush()
 
     def load_phrases(self):
         """Load starter phrases and learning patterns"""
@@ -215,15 +294,14 @@ class NailAdvisor:
         self, user_id: int, message: str, response: str, response_type: str
     ):
         """Log user interactions for learning"""
-        cursor = self.bot.conn.cursor()
-        cursor.execute(
+        # Handed to the writer thread; the handler never waits on a commit
+        self.bot.db.write(
             """
             INSERT INTO interactions (user_id, message, response_type, timestamp, phrases_used)
             VALUES (?, ?, ?, ?, ?)
         """,
             (user_id, message, response_type, datetime.now(), response),
         )
-        self.bot.conn.commit()
 
 
 # Initialize bot instance
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from db_schema import utc_timestamp
+
+logger = logging.getLogger(__name__)
+
+# last_active is a utc_timestamp() string, the clock the counter trigger uses
+Activity = Tuple[Optional[str], Optional[str], str]
+
+
+class ActivityTracker:
+    """Buffers per-user last-seen times and writes them in one batch per interval"""
+
+    def __init__(self, db, flush_interval: float = 5.0):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.pending: Dict[int, Activity] = {}
+        self._task = None
+        self.stats = {"touches": 0, "flushes": 0, "rows_written": 0}
+
+    def touch(self, user_id: int, username: str = None, first_name: str = None):
+        """Record that a user was just active; repeated touches coalesce"""
+        self.pending[user_id] = (username, first_name, utc_timestamp())
+        self.stats["touches"] += 1
+
+    def touch_user(self, user):
+        """touch() from a Telegram User, ignoring updates without one"""
+        if user is not None:
+            self.touch(user.id, user.username, user.first_name)
+
+    async def flush(self):
+        """Write every buffered user in a single batched upsert"""
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        rows = [
+            (user_id, username, first_name, last_seen)
+            for user_id, (username, first_name, last_seen) in pending.items()
+        ]
+        try:
+            await self.db.touch_users(rows)
+        except Exception:
+            # Retry next interval; a touch made since the swap is newer and wins
+            for user_id, activity in pending.items():
+                self.pending.setdefault(user_id, activity)
+            raise
+        self.stats["flushes"] += 1
+        self.stats["rows_written"] += len(rows)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing user activity: {e}")
+
+    def start(self):
+        """Start the periodic flush task on the running loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop the flush task and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
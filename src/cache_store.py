@@ -0,0 +1,164 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+
+def encode(value: Any) -> str:
+    """Compact JSON stored for a value; with the key it makes up the entry's size"""
+    return json.dumps(value, separators=(",", ":"))
+
+class PersistentCacheStore:
+    """Single-file SQLite cache with an expiry index and a size cap.
+
+    Values are stored as JSON, so only plain data (dicts, lists, strings,
+    numbers) can be cached and loading a cache file never runs code.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache (expires_at)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        self.evictions = 0
+        # Optional callback receiving the keys of entries evicted by the cap
+        self.on_evict = None
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) for a live key, else None"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        """Look up many keys in one query; expired and missing keys are omitted"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        found = {}
+        now = time.time()
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, value, expires_at FROM cache "
+                    f"WHERE key IN ({','.join('?' * len(chunk))}) AND expires_at > ?",
+                    (*chunk, now),
+                )
+                for key, value, expires_at in rows:
+                    try:
+                        found[key] = (json.loads(value), expires_at)
+                    except ValueError as e:
+                        logger.warning(f"Dropping unreadable cache entry {key}: {e}")
+        return found
+
+    def set(self, key: str, value: Any, expires_at: float) -> bool:
+        return self.set_many([(key, value)], expires_at) == 1
+
+    def set_many(self, items: Iterable[Tuple[str, Any]], expires_at: float) -> int:
+        """Store many entries in one transaction; returns how many were written"""
+        rows: List[Tuple[str, str, float, int]] = []
+        for key, value in items:
+            try:
+                encoded = encode(value)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Not caching {key}: value is not JSON serializable ({e})")
+                continue
+            rows.append((key, encoded, expires_at, len(key) + len(encoded)))
+        if not rows:
+            return 0
+
+        with self._lock, self.conn:
+            replaced = self._sizes([key for key, *_ in rows])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, size) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self.total_bytes += sum(row[3] for row in rows) - sum(replaced.values())
+            if self.total_bytes > self.max_bytes:
+                self._shrink()
+        return len(rows)
+
+    def delete(self, key: str):
+        with self._lock, self.conn:
+            size = self._sizes([key]).get(key, 0)
+            self.conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self.total_bytes -= size
+
+    def _sizes(self, keys: List[str]) -> Dict[str, int]:
+        sizes = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            sizes.update(
+                self.conn.execute(
+                    f"SELECT key, size FROM cache WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        return sizes
+
+    def _shrink(self):
+        """Evict expired entries, then those closest to expiry, to 90% of the cap"""
+        self._purge(time.time())
+        target = self.max_bytes * 0.9
+        while self.total_bytes > target:
+            rows = self.conn.execute(
+                "SELECT key, size FROM cache ORDER BY expires_at LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            self.conn.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key, _ in rows])
+            self.total_bytes -= sum(size for _, size in rows)
+            self.evictions += len(rows)
+            if self.on_evict:
+                self.on_evict([key for key, _ in rows])
+
+    def _purge(self, now: float) -> int:
+        freed, removed = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM cache WHERE expires_at <= ?", (now,)
+        ).fetchone()
+        if removed:
+            self.conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+            self.total_bytes -= freed
+        return removed
+
+    def purge_expired(self) -> int:
+        """Delete every expired entry using the expiry index"""
+        with self._lock, self.conn:
+            return self._purge(time.time())
+
+    def namespace_usage(self) -> Dict[str, Tuple[int, int]]:
+        """(entries, bytes) per "namespace:" key prefix"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT substr(key, 1, instr(key, ':') - 1), COUNT(*), SUM(size) "
+                "FROM cache GROUP BY 1"
+            ).fetchall()
+        return {namespace: (entries, size) for namespace, entries, size in rows}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
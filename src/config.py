@@ -1 +1,59 @@
-BOT_TOKEN = "your-bot-token-here"
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "your-bot-token-here")
+DATABASE_URL = os.getenv("DATABASE_URL", "twinailz_data.db")
+# Users are spread over this many <name>.shardNN.db files when > 1; changing
+# it on an existing database needs database_sharded.py --reshard
+DATABASE_SHARDS = int(os.getenv("DATABASE_SHARDS", "1"))
+# Persistent cache (one SQLite file) used by CacheManager
+CACHE_DIR = os.getenv("CACHE_DIR", "cache/")
+CACHE_MEMORY_ENTRIES = int(os.getenv("CACHE_MEMORY_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Memory-tier eviction: lru, lfu or tinylfu
+CACHE_POLICY = os.getenv("CACHE_POLICY", "lru")
+
+# Enables debug-only commands such as /cachestats
+DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"
+
+# Nail knowledge configuration
+NAIL_TRENDS_API = os.getenv("NAIL_TRENDS_API", None)
+
+# LLM response cache
+TRENDS_CACHE_TTL_MINUTES = int(os.getenv("TRENDS_CACHE_TTL_MINUTES", "60"))
+# Past the TTL, stale trends are still served for this long while one refresh runs
+TRENDS_STALE_MINUTES = int(os.getenv("TRENDS_STALE_MINUTES", "30"))
+# Only the sync TwiNailzAI uses this; the bot caches trends in CACHE_DIR
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", None)
+SIMILARITY_CACHE_THRESHOLD = float(os.getenv("SIMILARITY_CACHE_THRESHOLD", "0.8"))
+SIMILARITY_CACHE_SIZE = int(os.getenv("SIMILARITY_CACHE_SIZE", "1000"))
+
+# LLM admission control
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+LLM_PER_USER_CONCURRENCY = int(os.getenv("LLM_PER_USER_CONCURRENCY", "1"))
+LLM_ADMISSION_TIMEOUT = float(os.getenv("LLM_ADMISSION_TIMEOUT", "15"))
+
+# LLM resilience
+LLM_REQUEST_DEADLINE = float(os.getenv("LLM_REQUEST_DEADLINE", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# Local intent routing in front of the LLM
+INTENT_ROUTER_THRESHOLD = float(os.getenv("INTENT_ROUTER_THRESHOLD", "0.6"))
+
+# Structured (JSON) recommendations rendered locally
+STRUCTURED_RECOMMENDATIONS = os.getenv("STRUCTURED_RECOMMENDATIONS", "false").lower() == "true"
+STRUCTURED_CACHE_TTL_MINUTES = int(os.getenv("STRUCTURED_CACHE_TTL_MINUTES", "720"))
+
+# Conversation history sent with each recommendation
+CONTEXT_MAX_TURNS = int(os.getenv("CONTEXT_MAX_TURNS", "6"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+
+# Coalesced users.last_active writes
+ACTIVITY_FLUSH_SECONDS = float(os.getenv("ACTIVITY_FLUSH_SECONDS", "5"))
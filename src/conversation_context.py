@@ -0,0 +1,108 @@
+import logging
+import re
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+Turn = Tuple[str, str]
+
+# Words that point back at earlier turns ("make it shorter", "another one")
+FOLLOW_UP_WORDS = {
+    "again", "also", "another", "else", "instead", "it", "more", "one", "ones",
+    "other", "same", "that", "them", "these", "they", "this", "those", "too", "why",
+}
+FOLLOW_UP_OPENERS = ("and ", "but ", "or ", "so ", "what about ", "how about ")
+# Shorter messages ("yes", "more please") only make sense in context
+STANDALONE_MIN_WORDS = 3
+
+
+def needs_history(message: str) -> bool:
+    """Whether a message refers back to the conversation rather than standing alone"""
+    words = re.findall(r"[a-z]+", message.lower())
+    if len(words) < STANDALONE_MIN_WORDS:
+        return True
+    if " ".join(words).startswith(FOLLOW_UP_OPENERS):
+        return True
+    return any(word in FOLLOW_UP_WORDS for word in words)
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class ConversationMemory:
+    """Per-user recent turns, backed by the conversations table"""
+
+    def __init__(
+        self,
+        db,
+        max_turns: int = 6,
+        token_budget: int = 1200,
+        max_users: int = 10000,
+        summary_chars: int = 80,
+    ):
+        self.db = db
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.max_users = max_users
+        self.summary_chars = summary_chars
+        self.turns: "OrderedDict[int, Deque[Turn]]" = OrderedDict()
+
+    async def _history(self, user_id: int) -> Deque[Turn]:
+        """Return the user's ring buffer, loading it from the database on a miss"""
+        history = self.turns.get(user_id)
+        if history is None:
+            rows = await self.db.get_recent_conversations(user_id, self.max_turns)
+            history = deque(((m or "", r or "") for m, r in rows), maxlen=self.max_turns)
+            self.turns[user_id] = history
+            if len(self.turns) > self.max_users:
+                self.turns.popitem(last=False)
+        self.turns.move_to_end(user_id)
+        return history
+
+    async def record(self, user_id: int, message: str, response: str, personality: str):
+        """Remember a turn in memory and persist it"""
+        history = await self._history(user_id)
+        history.append((message, response))
+        await self.db.save_conversation(user_id, message, response, personality)
+
+    def _summarize(self, turns: List[Turn]) -> str:
+        """One-line digest of turns that no longer fit verbatim"""
+        asked = "; ".join(message[: self.summary_chars] for message, _ in turns)
+        return f"Earlier in this conversation the user asked about: {asked}"
+
+    async def build_messages(
+        self, user_id: int, system_prompt: str, user_prompt: str
+    ) -> List[Dict[str, str]]:
+        """Build a chat prompt with as much recent history as the budget allows"""
+        history = list(await self._history(user_id))
+        used = count_tokens(system_prompt) + count_tokens(user_prompt)
+
+        # Walk newest to oldest, keeping whole turns while they fit
+        kept: List[Turn] = []
+        while history:
+            message, response = history[-1]
+            cost = count_tokens(message) + count_tokens(response)
+            if used + cost > self.token_budget:
+                break
+            used += cost
+            kept.insert(0, history.pop())
+
+        messages = [{"role": "system", "content": system_prompt}]
+        if history:
+            summary = self._summarize(history)
+            if used + count_tokens(summary) <= self.token_budget:
+                used += count_tokens(summary)
+                messages.append({"role": "system", "content": summary})
+        for message, response in kept:
+            messages.append({"role": "user", "content": message})
+            messages.append({"role": "assistant", "content": response})
+        messages.append({"role": "user", "content": user_prompt})
+
+        logger.info(
+            f"Prompt for user {user_id}: ~{used} tokens, {len(kept)} turns kept, "
+            f"{len(history)} summarized (budget {self.token_budget})"
+        )
+        return messages
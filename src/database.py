@@ -1,6 +1,7 @@
 import logging
-import sqlite3
-from datetime import datetime
+
+from db_pool import ConnectionPool
+from db_schema import ensure_counters, ensure_indexes
 
 logger = logging.getLogger(__name__)
 
@@ -8,12 +9,13 @@ logger = logging.getLogger(__name__)
 class NailDatabase:
     def __init__(self, db_path: str = "twinailz_data.db"):
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path)
         self.init_database()
 
     def init_database(self):
         """Initialize database with required tables"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.pool.connection()
             cursor = conn.cursor()
 
             # Users table
@@ -59,7 +61,8 @@ class NailDatabase:
             )
 
             conn.commit()
-            conn.close()
+            ensure_indexes(conn)
+            ensure_counters(conn)
             logger.info("✅ Database initialized successfully")
 
         except Exception as e:
@@ -69,26 +72,23 @@ class NailDatabase:
     def add_user_sync(self, user_id: int, username: str = None, first_name: str = None):
         """Add new user to database (sync version)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT OR REPLACE INTO users (user_id, username, first_name, last_active) VALUES (?, ?, ?, ?)",
-                (user_id, username, first_name, datetime.now()),
+            conn = self.pool.connection()
+            conn.execute(
+                "INSERT INTO users (user_id, username, first_name, last_active) VALUES (?, ?, ?, CURRENT_TIMESTAMP) "
+                "ON CONFLICT(user_id) DO UPDATE SET username = excluded.username, "
+                "first_name = excluded.first_name, last_active = excluded.last_active",
+                (user_id, username, first_name),
             )
             conn.commit()
-            conn.close()
         except Exception as e:
             logger.error(f"Error adding user: {e}")
 
     def get_user_sync(self, user_id: int):
         """Get user data (sync version)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-            result = cursor.fetchone()
-            conn.close()
-            return result
+            conn = self.pool.connection()
+            cursor = conn.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
+            return cursor.fetchone()
         except Exception as e:
             logger.error(f"Error getting user: {e}")
             return None
@@ -98,17 +98,31 @@ class NailDatabase:
     ):
         """Save conversation to database (sync version)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(
+            conn = self.pool.connection()
+            conn.execute(
                 "INSERT INTO conversations (user_id, message, response, personality) VALUES (?, ?, ?, ?)",
                 (user_id, message, response, personality),
             )
             conn.commit()
-            conn.close()
         except Exception as e:
             logger.error(f"Error saving conversation: {e}")
 
+    def get_totals_sync(self):
+        """Total users and interactions, read from the maintained counters"""
+        try:
+            conn = self.pool.connection()
+            users, interactions = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(interaction_count), 0) FROM users"
+            ).fetchone()
+            return {"users": users, "interactions": interactions}
+        except Exception as e:
+            logger.error(f"Error getting totals: {e}")
+            return {"users": 0, "interactions": 0}
+
+    def close(self):
+        """Close pooled connections"""
+        self.pool.close_all()
+
 
 # Initialize database
 nail_db = NailDatabase()
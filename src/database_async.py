@@ -1,63 +1,183 @@
+import asyncio
+import itertools
 import logging
-from datetime import datetime
 
 import aiosqlite
 
+from db_schema import (
+    COUNTER_COLUMNS,
+    COUNTER_TRIGGER_NAME,
+    INDEXES,
+    PERSONALITIES,
+    counter_migrations,
+)
+
 logger = logging.getLogger(__name__)
 
 
 class AsyncNailDatabase:
-    def __init__(self, db_path: str = "twinailz_data.db"):
+    def __init__(
+        self,
+        db_path: str = "twinailz_data.db",
+        batch_size: int = 256,
+        flush_interval: float = 0.005,
+    ):
         self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._db = None
+        self._queue = None
+        self._writer = None
+        self._connect_lock = asyncio.Lock()
+
+    async def _connection(self) -> aiosqlite.Connection:
+        """Open the shared connection and start the writer on first use"""
+        if self._db is None:
+            async with self._connect_lock:
+                if self._db is None:
+                    db = await aiosqlite.connect(self.db_path)
+                    await db.execute("PRAGMA journal_mode=WAL")
+                    await db.execute("PRAGMA synchronous=NORMAL")
+                    await db.execute("PRAGMA busy_timeout=5000")
+                    self._queue = asyncio.Queue()
+                    self._writer = asyncio.create_task(self._write_loop())
+                    self._db = db
+        return self._db
+
+    async def _write(self, query: str, params: tuple):
+        """Queue a write and wait until the batch containing it commits"""
+        await self._connection()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, params, future))
+        await future
+
+    async def _write_loop(self):
+        """Group-commit queued writes: one transaction per batch"""
+        while True:
+            batch = [await self._queue.get()]
+            if batch[0] is None:
+                self._queue.task_done()
+                return
+            self._drain_into(batch)
+            if len(batch) < self.batch_size and self.flush_interval:
+                # Give concurrent handlers a moment to join this transaction
+                await asyncio.sleep(self.flush_interval)
+                self._drain_into(batch)
+
+            stop = batch[-1] is None
+            writes = batch[:-1] if stop else batch
+            await self._commit(writes)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _drain_into(self, batch: list):
+        while len(batch) < self.batch_size and batch[-1] is not None:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return
+
+    async def _commit(self, writes: list):
+        try:
+            # Runs of the same statement go through one executemany call
+            for query, group in itertools.groupby(writes, key=lambda w: w[0]):
+                await self._db.executemany(query, [params for _, params, _ in group])
+            await self._db.commit()
+        except Exception as e:
+            # Isolate the bad row: replay the batch one write per transaction
+            logger.warning(f"Batch commit failed, retrying writes singly: {e}")
+            await self._db.rollback()
+            for query, params, future in writes:
+                try:
+                    await self._db.execute(query, params)
+                    await self._db.commit()
+                except Exception as row_error:
+                    await self._db.rollback()
+                    if not future.done():
+                        future.set_exception(row_error)
+        for _, _, future in writes:
+            if not future.done():
+                future.set_result(None)
+
+    @property
+    def paths(self) -> list:
+        return [self.db_path]
+
+    async def flush(self):
+        """Wait until every queued write has been committed"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """Flush pending writes, stop the writer and close the connection"""
+        if self._db is None:
+            return
+        await self._queue.put(None)
+        await self._writer
+        await self._db.close()
+        self._db = None
 
     async def init_database(self):
         """Initialize database with required tables (async)"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Users table
-                await db.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS users (
-                        user_id INTEGER PRIMARY KEY,
-                        username TEXT,
-                        first_name TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        personality_preference TEXT DEFAULT 'lumi',
-                        interaction_count INTEGER DEFAULT 0
-                    )
+            db = await self._connection()
+            # Users table
+            await db.execute(
                 """
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id INTEGER PRIMARY KEY,
+                    username TEXT,
+                    first_name TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    personality_preference TEXT DEFAULT 'lumi',
+                    interaction_count INTEGER DEFAULT 0
                 )
+            """
+            )
 
-                # Conversations table
-                await db.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS conversations (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER,
-                        message TEXT,
-                        response TEXT,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        personality TEXT,
-                        FOREIGN KEY (user_id) REFERENCES users (user_id)
-                    )
+            # Conversations table
+            await db.execute(
                 """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    message TEXT,
+                    response TEXT,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    personality TEXT,
+                    FOREIGN KEY (user_id) REFERENCES users (user_id)
                 )
+            """
+            )
 
-                # Trends cache
-                await db.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS trends_cache (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        trend_data TEXT,
-                        cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        expires_at TIMESTAMP
-                    )
+            # Trends cache
+            await db.execute(
                 """
+                CREATE TABLE IF NOT EXISTS trends_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    trend_data TEXT,
+                    cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    expires_at TIMESTAMP
                 )
+            """
+            )
+
+            await db.execute(INDEXES["conversations"])
+            async with db.execute("PRAGMA table_info(users)") as cursor:
+                columns = [row[1] for row in await cursor.fetchall()]
+            async with db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                (COUNTER_TRIGGER_NAME,),
+            ) as cursor:
+                trigger_exists = await cursor.fetchone() is not None
+            for statement in counter_migrations(columns, trigger_exists):
+                await db.execute(statement)
 
-                await db.commit()
-                logger.info("✅ Async Database initialized successfully")
+            await db.commit()
+            logger.info("✅ Async Database initialized successfully")
         except Exception as e:
             logger.error(f"❌ Database initialization error: {e}")
             raise
@@ -67,43 +187,109 @@ class AsyncNailDatabase:
     ):
         """Add new user to database (async)"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute(
-                    "INSERT OR REPLACE INTO users (user_id, username, first_name, last_active) VALUES (?, ?, ?, ?)",
-                    (user_id, username, first_name, datetime.now()),
-                )
-                await db.commit()
+            await self._write(
+                "INSERT INTO users (user_id, username, first_name, last_active) VALUES (?, ?, ?, CURRENT_TIMESTAMP) "
+                "ON CONFLICT(user_id) DO UPDATE SET username = excluded.username, "
+                "first_name = excluded.first_name, last_active = excluded.last_active",
+                (user_id, username, first_name),
+            )
         except Exception as e:
             logger.error(f"Error adding user: {e}")
 
+    async def touch_users(self, rows: list):
+        """Upsert (user_id, username, first_name, last_active) rows in one transaction"""
+        # last_active must be a db_schema.utc_timestamp() string for MAX to order it
+        # Queued together, the rows land in a single executemany batch
+        await asyncio.gather(
+            *(
+                self._write(
+                    "INSERT INTO users (user_id, username, first_name, last_active) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET "
+                    "username = COALESCE(excluded.username, username), "
+                    "first_name = COALESCE(excluded.first_name, first_name), "
+                    "last_active = MAX(COALESCE(last_active, ''), excluded.last_active)",
+                    row,
+                )
+                for row in rows
+            )
+        )
+
     async def save_conversation(
         self, user_id: int, message: str, response: str, personality: str
     ):
         """Save conversation to database (async)"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute(
-                    "INSERT INTO conversations (user_id, message, response, personality) VALUES (?, ?, ?, ?)",
-                    (user_id, message, response, personality),
-                )
-                await db.commit()
+            await self._write(
+                "INSERT INTO conversations (user_id, message, response, personality) VALUES (?, ?, ?, ?)",
+                (user_id, message, response, personality),
+            )
         except Exception as e:
             logger.error(f"Error saving conversation: {e}")
 
+    async def get_recent_conversations(self, user_id: int, limit: int = 10):
+        """Get a user's most recent (message, response) pairs, oldest first"""
+        try:
+            db = await self._connection()
+            async with db.execute(
+                "SELECT message, response FROM conversations WHERE user_id = ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+                (user_id, limit),
+            ) as cursor:
+                rows = await cursor.fetchall()
+            return list(reversed(rows))
+        except Exception as e:
+            logger.error(f"Error getting conversations: {e}")
+            return []
+
     async def get_user_stats(self, user_id: int):
         """Get user statistics"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute(
-                    "SELECT COUNT(*) as interaction_count FROM conversations WHERE user_id = ?",
-                    (user_id,),
-                )
+            db = await self._connection()
+            async with db.execute(
+                "SELECT interaction_count FROM users WHERE user_id = ?",
+                (user_id,),
+            ) as cursor:
                 result = await cursor.fetchone()
-                return result[0] if result else 0
+            return result[0] or 0 if result else 0
         except Exception as e:
             logger.error(f"Error getting user stats: {e}")
             return 0
 
+    async def get_user_counters(self, user_id: int):
+        """Get interaction_count, last_active and per-personality counts"""
+        try:
+            db = await self._connection()
+            async with db.execute(
+                f"SELECT interaction_count, last_active, {', '.join(COUNTER_COLUMNS)} "
+                "FROM users WHERE user_id = ?",
+                (user_id,),
+            ) as cursor:
+                result = await cursor.fetchone()
+            if not result:
+                return None
+            return {
+                "interaction_count": result[0] or 0,
+                "last_active": result[1],
+                "personalities": {
+                    name: count or 0 for name, count in zip(PERSONALITIES, result[2:])
+                },
+            }
+        except Exception as e:
+            logger.error(f"Error getting user counters: {e}")
+            return None
+
+    async def get_totals(self):
+        """Total users and interactions, read from the maintained counters"""
+        try:
+            db = await self._connection()
+            async with db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(interaction_count), 0) FROM users"
+            ) as cursor:
+                users, interactions = await cursor.fetchone()
+            return {"users": users, "interactions": interactions}
+        except Exception as e:
+            logger.error(f"Error getting totals: {e}")
+            return {"users": 0, "interactions": 0}
+
 
 # Initialize async database
 nail_db_async = AsyncNailDatabase()
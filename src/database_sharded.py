@@ -0,0 +1,298 @@
+import asyncio
+import glob
+import logging
+import os
+import sqlite3
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from functools import partial
+from typing import Dict, List, Optional
+
+from database import NailDatabase
+from database_async import AsyncNailDatabase
+from db_schema import rebuild_counters
+
+logger = logging.getLogger(__name__)
+
+# Per-user tables that live in the shards; everything else stays global
+SHARDED_TABLES = ("conversations", "users")
+# The shard count is pinned in the global file so a config change can't
+# silently hide history that lives in other files
+LAYOUT_TABLE = "CREATE TABLE IF NOT EXISTS storage_layout (name TEXT PRIMARY KEY, value INTEGER)"
+
+
+class ShardLayoutError(RuntimeError):
+    """The configured shard count doesn't match the data on disk"""
+
+
+def shard_index(user_id: int, shards: int) -> int:
+    """Stable shard for a user; the same across processes and restarts"""
+    return zlib.crc32(str(user_id).encode()) % shards
+
+
+def shard_path(db_path: str, index: int) -> str:
+    """twinailz_data.db -> twinailz_data.shard00.db"""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.shard{index:02d}{ext or '.db'}"
+
+
+def layout_paths(db_path: str, shards: int) -> List[str]:
+    """Files holding per-user tables for a shard count; 1 means db_path itself"""
+    if shards <= 1:
+        return [db_path]
+    return [shard_path(db_path, i) for i in range(shards)]
+
+
+def recorded_shards(db_path: str) -> Optional[int]:
+    """Shard count pinned in the global file, or None if never recorded"""
+    if not os.path.exists(db_path):
+        return None
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute(LAYOUT_TABLE)
+        row = conn.execute("SELECT value FROM storage_layout WHERE name = 'shards'").fetchone()
+    return row[0] if row else None
+
+
+def record_shards(db_path: str, shards: int):
+    with closing(sqlite3.connect(db_path)) as conn, conn:
+        conn.execute(LAYOUT_TABLE)
+        conn.execute("INSERT OR REPLACE INTO storage_layout VALUES ('shards', ?)", (shards,))
+
+
+def _has_user_rows(path: str) -> bool:
+    with closing(sqlite3.connect(path)) as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return any(
+            conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+            for table in SHARDED_TABLES
+            if table in tables
+        )
+
+
+def check_layout(db_path: str, shards: int):
+    """Pin the shard count on first use; refuse a count that doesn't match the data"""
+    recorded = recorded_shards(db_path)
+    if recorded is None:
+        # Databases from before sharding keep their users in db_path itself
+        if shards > 1 and os.path.exists(db_path) and _has_user_rows(db_path):
+            recorded = 1
+        else:
+            record_shards(db_path, shards)
+            return
+    if recorded != max(shards, 1):
+        raise ShardLayoutError(
+            f"{db_path} holds users in {recorded} shard(s) but {shards} are configured; "
+            f"stop the bot and run: python database_sharded.py {db_path} --reshard {shards}"
+        )
+
+
+def _routes_to(shards: int, index: int, user_id: int) -> bool:
+    return shard_index(user_id, shards) == index
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _move_rows(source: str, target: str, belongs_to_target) -> int:
+    """Move the rows belongs_to_target(user_id) selects from source to target.
+
+    Both files are switched to a rollback journal so the copy and the delete
+    commit atomically across them; re-running after a crash is safe because
+    moved rows no longer match in source.
+    """
+    with closing(sqlite3.connect(source, isolation_level=None)) as conn:
+        conn.create_function("belongs_to_target", 1, belongs_to_target, deterministic=True)
+        conn.execute("ATTACH DATABASE ? AS target", (target,))
+        conn.execute("PRAGMA main.journal_mode=DELETE")
+        conn.execute("PRAGMA target.journal_mode=DELETE")
+        moved = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in SHARDED_TABLES:
+                source_columns = _columns(conn, "main", table)
+                if not source_columns:
+                    continue
+                # Conversation ids are per file; the target assigns new ones in order
+                shared = [
+                    column
+                    for column in _columns(conn, "target", table)
+                    if column in source_columns and not (table == "conversations" and column == "id")
+                ]
+                columns = ", ".join(shared)
+                order = " ORDER BY id" if table == "conversations" else ""
+                conn.execute(
+                    f"INSERT OR REPLACE INTO target.{table} ({columns}) "
+                    f"SELECT {columns} FROM main.{table} WHERE belongs_to_target(user_id){order}"
+                )
+                moved += conn.execute(
+                    f"DELETE FROM main.{table} WHERE belongs_to_target(user_id)"
+                ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("PRAGMA target.journal_mode=WAL")
+        conn.execute("PRAGMA main.journal_mode=WAL")
+        conn.execute("DETACH DATABASE target")
+    return moved
+
+
+def reshard(db_path: str, shards: int) -> int:
+    """Move every user's rows into the file the new shard count routes them to.
+
+    Must run with the bot stopped. Scans db_path and every existing shard
+    file, so it also finishes a previously interrupted run. Returns the
+    number of rows moved.
+    """
+    shards = max(shards, 1)
+    root, ext = os.path.splitext(db_path)
+    existing = sorted(glob.glob(f"{glob.escape(root)}.shard[0-9][0-9]{ext or '.db'}"))
+    targets = layout_paths(db_path, shards)
+
+    # Creating the target files gives them the current schema and counter trigger
+    for path in targets:
+        NailDatabase(path).close()
+
+    moved = 0
+    for source in dict.fromkeys([db_path, *existing]):
+        for index, target in enumerate(targets):
+            if target == source:
+                continue
+            moved += _move_rows(source, target, partial(_routes_to, shards, index))
+        if source not in targets:
+            # An emptied shard from the old layout; the global file always stays
+            if source != db_path:
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(source + suffix):
+                        os.remove(source + suffix)
+
+    # Moved users rows carry counters from their old file; recount from history
+    for path in targets:
+        with closing(sqlite3.connect(path)) as conn:
+            rebuild_counters(conn)
+    record_shards(db_path, shards)
+    logger.info(f"Resharded {db_path} into {shards} shard(s), moved {moved} rows")
+    return moved
+
+
+def sum_totals(totals: List[Dict[str, int]]) -> Dict[str, int]:
+    return {key: sum(t[key] for t in totals) for key in ("users", "interactions")}
+
+
+class ShardedNailDatabase:
+    """NailDatabase spread over N files by user_id, plus a global file for shared data"""
+
+    def __init__(self, db_path: str = "twinailz_data.db", shards: int = 4):
+        check_layout(db_path, shards)
+        self.db_path = db_path
+        self.global_db = NailDatabase(db_path)
+        self.shards = [NailDatabase(shard_path(db_path, i)) for i in range(shards)]
+        self._executor = ThreadPoolExecutor(max_workers=shards, thread_name_prefix="shard")
+
+    def shard(self, user_id: int) -> NailDatabase:
+        return self.shards[shard_index(user_id, len(self.shards))]
+
+    def add_user_sync(self, user_id: int, username: str = None, first_name: str = None):
+        self.shard(user_id).add_user_sync(user_id, username, first_name)
+
+    def get_user_sync(self, user_id: int):
+        return self.shard(user_id).get_user_sync(user_id)
+
+    def save_conversation_sync(self, user_id: int, message: str, response: str, personality: str):
+        self.shard(user_id).save_conversation_sync(user_id, message, response, personality)
+
+    def get_totals_sync(self) -> Dict[str, int]:
+        """Users and interactions summed over every shard, queried in parallel"""
+        return sum_totals(list(self._executor.map(lambda db: db.get_totals_sync(), self.shards)))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for db in self.shards:
+            db.close()
+        self.global_db.close()
+
+
+class ShardedAsyncNailDatabase:
+    """AsyncNailDatabase spread over N files by user_id, plus a global file for shared data"""
+
+    def __init__(self, db_path: str = "twinailz_data.db", shards: int = 4, **options):
+        check_layout(db_path, shards)
+        self.db_path = db_path
+        self.global_db = AsyncNailDatabase(db_path, **options)
+        self.shards = [
+            AsyncNailDatabase(shard_path(db_path, i), **options) for i in range(shards)
+        ]
+
+    @property
+    def paths(self) -> List[str]:
+        return [db.db_path for db in self.shards]
+
+    def shard(self, user_id: int) -> AsyncNailDatabase:
+        return self.shards[shard_index(user_id, len(self.shards))]
+
+    async def _each(self, method: str, *args) -> list:
+        """Run the same call on the global DB and every shard concurrently"""
+        return await asyncio.gather(
+            *(getattr(db, method)(*args) for db in [self.global_db, *self.shards])
+        )
+
+    async def init_database(self):
+        await self._each("init_database")
+        logger.info(f"✅ Sharded database ready ({len(self.shards)} shards)")
+
+    async def add_user(self, user_id: int, username: str = None, first_name: str = None):
+        await self.shard(user_id).add_user(user_id, username, first_name)
+
+    async def touch_users(self, rows: list):
+        by_shard: Dict[int, list] = {}
+        for row in rows:
+            by_shard.setdefault(shard_index(row[0], len(self.shards)), []).append(row)
+        await asyncio.gather(
+            *(self.shards[index].touch_users(group) for index, group in by_shard.items())
+        )
+
+    async def save_conversation(self, user_id: int, message: str, response: str, personality: str):
+        await self.shard(user_id).save_conversation(user_id, message, response, personality)
+
+    async def get_recent_conversations(self, user_id: int, limit: int = 10):
+        return await self.shard(user_id).get_recent_conversations(user_id, limit)
+
+    async def get_user_stats(self, user_id: int):
+        return await self.shard(user_id).get_user_stats(user_id)
+
+    async def get_user_counters(self, user_id: int):
+        return await self.shard(user_id).get_user_counters(user_id)
+
+    async def get_totals(self) -> Dict[str, int]:
+        """Users and interactions summed over every shard, queried in parallel"""
+        return sum_totals(
+            await asyncio.gather(*(db.get_totals() for db in self.shards))
+        )
+
+    async def flush(self):
+        await self._each("flush")
+
+    async def close(self):
+        await self._each("close")
+
+
+def create_async_database(db_path: str, shards: int = 1, **options):
+    """AsyncNailDatabase, or its sharded counterpart when shards > 1.
+
+    Raises ShardLayoutError if shards differs from the count db_path was
+    created or last resharded with.
+    """
+    if shards > 1:
+        return ShardedAsyncNailDatabase(db_path, shards, **options)
+    check_layout(db_path, shards)
+    return AsyncNailDatabase(db_path, **options)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[2] != "--reshard":
+        print("usage: python database_sharded.py <db> --reshard <shards>")
+        sys.exit(2)
+    print(f"Moved {reshard(sys.argv[1], int(sys.argv[3]))} rows")
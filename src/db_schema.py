@@ -0,0 +1,205 @@
+"""Secondary indexes, per-user counters and query-plan checks"""
+import logging
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Format of SQLite's CURRENT_TIMESTAMP; every timestamp column uses UTC in it
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def utc_timestamp() -> str:
+    """Now, as CURRENT_TIMESTAMP would store it"""
+    return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+# (user_id, timestamp) covers per-user counts and newest-first history;
+# the implicit rowid suffix breaks timestamp ties in insertion order
+INDEXES = {
+    "conversations": "CREATE INDEX IF NOT EXISTS idx_conversations_user_time ON conversations (user_id, timestamp)",
+    "user_interactions": "CREATE INDEX IF NOT EXISTS idx_user_interactions_user_time ON user_interactions (user_id, timestamp)",
+    "interactions": "CREATE INDEX IF NOT EXISTS idx_interactions_user_time ON interactions (user_id, timestamp)",
+}
+
+HOT_QUERIES = {
+    "conversations": [
+        "SELECT COUNT(*) FROM conversations WHERE user_id = ?",
+        "SELECT message, response FROM conversations WHERE user_id = ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+    ],
+    "user_interactions": [
+        "SELECT COUNT(*) FROM user_interactions WHERE user_id = ?",
+        "SELECT * FROM user_interactions WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?",
+    ],
+    "interactions": [
+        "SELECT COUNT(*) FROM interactions WHERE user_id = ?",
+        "SELECT * FROM interactions WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?",
+    ],
+}
+
+
+# Personalities with a dedicated <name>_count column on users
+PERSONALITIES = ("lumi", "zae", "twinailz")
+COUNTER_COLUMNS = [f"{name}_count" for name in PERSONALITIES]
+
+# Keeps users.interaction_count, last_active and the per-personality
+# counters current in the same transaction as each conversation insert,
+# whichever connection (sync, async, batched) performs it
+COUNTER_TRIGGER_NAME = "trg_conversations_counters"
+COUNTER_TRIGGER = f"""
+CREATE TRIGGER IF NOT EXISTS {COUNTER_TRIGGER_NAME}
+AFTER INSERT ON conversations
+BEGIN
+    INSERT OR IGNORE INTO users (user_id) VALUES (NEW.user_id);
+    UPDATE users SET
+        interaction_count = COALESCE(interaction_count, 0) + 1,
+        last_active = COALESCE(NEW.timestamp, CURRENT_TIMESTAMP),
+        {", ".join(f"{column} = COALESCE({column}, 0) + (NEW.personality IS '{name}')" for name, column in zip(PERSONALITIES, COUNTER_COLUMNS))}
+    WHERE user_id = NEW.user_id;
+END
+"""
+
+
+class QueryPlanError(AssertionError):
+    """A hot query would scan a whole table"""
+
+
+def existing_tables(conn: sqlite3.Connection) -> List[str]:
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return [row[0] for row in rows]
+
+
+def ensure_indexes(conn: sqlite3.Connection):
+    """Create the per-user indexes for whichever history tables exist"""
+    for table in existing_tables(conn):
+        if table in INDEXES:
+            conn.execute(INDEXES[table])
+    conn.commit()
+
+
+def counter_trigger_exists(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+        (COUNTER_TRIGGER_NAME,),
+    ).fetchone()
+    return row is not None
+
+
+def counter_rebuild() -> List[str]:
+    """Statements that recompute every user's counters from conversation history"""
+    totals = ", ".join(f"SUM(personality IS '{name}')" for name in PERSONALITIES)
+    columns = ", ".join(COUNTER_COLUMNS)
+    return [
+        "DROP TABLE IF EXISTS temp.counter_totals",
+        f"CREATE TEMP TABLE counter_totals "
+        f"(user_id INTEGER PRIMARY KEY, total INTEGER, last_ts TIMESTAMP, {columns})",
+        f"INSERT INTO counter_totals SELECT user_id, COUNT(*), MAX(timestamp), {totals} "
+        f"FROM conversations GROUP BY user_id",
+        "INSERT OR IGNORE INTO users (user_id) SELECT user_id FROM counter_totals",
+        f"UPDATE users SET (interaction_count, last_active, {columns}) = "
+        f"(SELECT t.total, MAX(COALESCE(users.last_active, t.last_ts), t.last_ts), "
+        f"{', '.join(f't.{column}' for column in COUNTER_COLUMNS)} "
+        f"FROM counter_totals t WHERE t.user_id = users.user_id) "
+        f"WHERE user_id IN (SELECT user_id FROM counter_totals)",
+        f"UPDATE users SET interaction_count = 0, "
+        f"{', '.join(f'{column} = 0' for column in COUNTER_COLUMNS)} "
+        f"WHERE user_id NOT IN (SELECT user_id FROM counter_totals)",
+        "DROP TABLE temp.counter_totals",
+    ]
+
+
+def counter_migrations(user_columns: List[str], trigger_exists: bool) -> List[str]:
+    """Statements that add missing counter columns and the counter trigger.
+
+    The first time the trigger is created, existing history is backfilled
+    into the counters; the trigger only counts conversations inserted after it.
+    """
+    statements = [
+        f"ALTER TABLE users ADD COLUMN {column} INTEGER DEFAULT 0"
+        for column in COUNTER_COLUMNS
+        if column not in user_columns
+    ]
+    if not trigger_exists:
+        statements.append(COUNTER_TRIGGER)
+        statements.extend(counter_rebuild())
+    return statements
+
+
+def ensure_counters(conn: sqlite3.Connection):
+    """Add the per-user counter columns and trigger to an existing database"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(users)")]
+    for statement in counter_migrations(columns, counter_trigger_exists(conn)):
+        conn.execute(statement)
+    conn.commit()
+
+
+def rebuild_counters(conn: sqlite3.Connection) -> int:
+    """Recompute every user's counters from conversation history in bulk"""
+    with conn:
+        for statement in counter_rebuild():
+            conn.execute(statement)
+    repaired = conn.execute("SELECT COUNT(DISTINCT user_id) FROM conversations").fetchone()[0]
+    logger.info(f"Rebuilt interaction counters for {repaired} users")
+    return repaired
+
+
+def explain(conn: sqlite3.Connection, query: str) -> List[str]:
+    """Return the EXPLAIN QUERY PLAN detail lines for query"""
+    params = (None,) * query.count("?")
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+def check_query_plans(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """Map each hot query that does a full table scan to its plan"""
+    tables = existing_tables(conn)
+    failures = {}
+    for table, queries in HOT_QUERIES.items():
+        if table not in tables:
+            continue
+        for query in queries:
+            plan = explain(conn, query)
+            if any(line.startswith(f"SCAN {table}") and "INDEX" not in line for line in plan):
+                failures[query] = plan
+    return failures
+
+
+def assert_query_plans(conn: sqlite3.Connection):
+    """Raise QueryPlanError if any hot query is not served by an index"""
+    failures = check_query_plans(conn)
+    if failures:
+        details = "\n".join(f"{query}\n    {plan}" for query, plan in failures.items())
+        raise QueryPlanError(f"Hot queries without an index:\n{details}")
+
+
+def main(db_path: str) -> Tuple[int, int]:
+    conn = sqlite3.connect(db_path)
+    checked = failed = 0
+    failures = check_query_plans(conn)
+    tables = existing_tables(conn)
+    for table, queries in HOT_QUERIES.items():
+        if table not in tables:
+            continue
+        for query in queries:
+            checked += 1
+            status = "FAIL" if query in failures else "ok"
+            failed += query in failures
+            print(f"[{status}] {query}")
+            for line in explain(conn, query):
+                print(f"       {line}")
+    conn.close()
+    return checked, failed
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--repair-counters"]
+    db_path = args[0] if args else "twinailz_data.db"
+    if "--repair-counters" in sys.argv:
+        conn = sqlite3.connect(db_path)
+        ensure_counters(conn)
+        print(f"Rebuilt counters for {rebuild_counters(conn)} users")
+        conn.close()
+    checked, failed = main(db_path)
+    print(f"{checked - failed}/{checked} hot queries use an index")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,89 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from constants import COLOR_RESPONSE, PARTY_RESPONSE, RESPONSE_KEYWORDS, WORK_RESPONSE
+from nail_features import OCCASION_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+CANNED_RESPONSES = {
+    "party": PARTY_RESPONSE,
+    "work": WORK_RESPONSE,
+    "color": COLOR_RESPONSE,
+}
+
+# One keyword per this many words still reads as a focused request
+KEYWORD_DENSITY_WORDS = 4
+
+# Occasion words name a situation a generic canned answer can't address
+OCCASION_WORDS = {
+    keyword for keywords in OCCASION_KEYWORDS.values() for keyword in keywords
+}
+
+
+@dataclass
+class RouteDecision:
+    intent: Optional[str]
+    confidence: float
+    response: Optional[str] = None
+
+    @property
+    def needs_llm(self) -> bool:
+        return self.response is None
+
+
+class IntentRouter:
+    """Answers clear-cut intents locally and escalates the rest to the LLM"""
+
+    def __init__(self, threshold: float = 0.6):
+        self.threshold = threshold
+        self.keyword_intents: Dict[str, str] = {
+            keyword: intent
+            for intent, keywords in RESPONSE_KEYWORDS.items()
+            for keyword in keywords
+        }
+        self.metrics = {
+            "llm_calls_avoided": 0,
+            "llm_calls_escalated": 0,
+            "intents": {},
+        }
+
+    def classify(self, message: str) -> Tuple[Optional[str], float]:
+        """Return the best keyword intent and a 0-1 confidence score"""
+        words = re.findall(r"[a-z]+", message.lower())
+        hits: Dict[str, int] = {}
+        for word in words:
+            intent = self.keyword_intents.get(word)
+            if intent:
+                hits[intent] = hits.get(intent, 0) + 1
+        if not hits:
+            return None, 0.0
+
+        intent, best = max(hits.items(), key=lambda item: item[1])
+        # Questions and occasions outside the intent ask for specifics
+        if "?" in message or any(
+            word in OCCASION_WORDS and self.keyword_intents.get(word) != intent
+            for word in words
+        ):
+            return intent, 0.0
+
+        # Mixed intents and long, detailed messages are ambiguous
+        share = best / sum(hits.values())
+        density = min(1.0, best * KEYWORD_DENSITY_WORDS / len(words))
+        return intent, share * density
+
+    def route(self, message: str) -> RouteDecision:
+        """Decide whether message can be answered without the LLM"""
+        intent, confidence = self.classify(message)
+        if intent in CANNED_RESPONSES and confidence >= self.threshold:
+            self.metrics["llm_calls_avoided"] += 1
+            self.metrics["intents"][intent] = self.metrics["intents"].get(intent, 0) + 1
+            return RouteDecision(intent, confidence, CANNED_RESPONSES[intent])
+
+        self.metrics["llm_calls_escalated"] += 1
+        return RouteDecision(intent, confidence)
+
+    def stats(self) -> Dict:
+        return {**self.metrics, "intents": dict(self.metrics["intents"])}
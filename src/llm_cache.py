@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """TTL cache for LLM responses with single-flight request coalescing"""
+
+    def __init__(self, ttl_minutes: int = 60, persist_path: Optional[str] = None):
+        self.ttl_seconds = ttl_minutes * 60
+        self.persist_path = persist_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.upstream_calls = 0
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]]) -> str:
+        """Build a cache key from the model and the full prompt"""
+        payload = json.dumps({"model": model, "messages": messages}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached response if it has not expired"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if time.time() >= entry["expires"]:
+            del self.entries[key]
+            return None
+        return entry["value"]
+
+    def set(self, key: str, value: str):
+        """Cache a response for the configured TTL"""
+        self.entries[key] = {"value": value, "expires": time.time() + self.ttl_seconds}
+        self._save()
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[str]]) -> str:
+        """Return the cached response or run fetch once for all concurrent callers"""
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        future = self.in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key, fetch))
+            self.in_flight[key] = future
+
+        # Shield so one cancelled waiter doesn't cancel the shared upstream call
+        return await asyncio.shield(future)
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[str]]) -> str:
+        try:
+            self.upstream_calls += 1
+            value = await fetch()
+            self.set(key, value)
+            return value
+        finally:
+            self.in_flight.pop(key, None)
+
+    def stats(self) -> Dict:
+        """get_or_fetch counters; misses joining an in-flight call cost no upstream call"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "upstream_calls": self.upstream_calls,
+            "in_flight": len(self.in_flight),
+            "entries": len(self.entries),
+        }
+
+    def _load(self):
+        """Load unexpired entries from the persistence file"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            now = time.time()
+            self.entries = {k: v for k, v in entries.items() if v["expires"] > now}
+        except Exception as e:
+            logger.warning(f"Failed to load LLM response cache: {e}")
+
+    def _save(self):
+        """Atomically write the cache to the persistence file"""
+        if not self.persist_path:
+            return
+        tmp_path = f"{self.persist_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            logger.warning(f"Failed to write LLM response cache: {e}")
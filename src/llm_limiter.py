@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when an LLM call cannot be admitted in time"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"LLM call rejected: {reason}")
+        self.reason = reason
+
+
+class TokenBucket:
+    """Per-minute token bucket that refills continuously"""
+
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = float(capacity_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float, deadline: float):
+        """Take amount tokens, waiting until deadline (monotonic) at most"""
+        amount = min(amount, self.capacity)
+        # The lock makes waiters queue in arrival order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+                remaining = deadline - time.monotonic()
+                if wait > remaining:
+                    raise asyncio.TimeoutError()
+                await asyncio.sleep(wait)
+
+    def adjust(self, amount: float):
+        """Return (negative) or charge (positive) tokens after the fact"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class LLMAdmission:
+    """Global and per-user admission control for LLM calls"""
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_minute: int = 500,
+        tokens_per_minute: int = 200000,
+        per_user_concurrency: int = 1,
+        timeout: float = 15.0,
+    ):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.per_user_concurrency = per_user_concurrency
+        self.timeout = timeout
+        self.user_in_flight: Dict[int, int] = {}
+
+        self.metrics = {
+            "admitted": 0,
+            "waiting": 0,
+            "in_flight": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0,
+            "rejected": {},
+        }
+
+    def _reject(self, reason: str):
+        self.metrics["rejected"][reason] = self.metrics["rejected"].get(reason, 0) + 1
+        logger.warning(f"LLM admission rejected: {reason}")
+        raise AdmissionRejected(reason)
+
+    @asynccontextmanager
+    async def admit(self, user_id: Optional[int] = None, estimated_tokens: int = 0):
+        """Hold an LLM slot for the duration of the block"""
+        if user_id is not None:
+            if self.user_in_flight.get(user_id, 0) >= self.per_user_concurrency:
+                self._reject("per_user_limit")
+            self.user_in_flight[user_id] = self.user_in_flight.get(user_id, 0) + 1
+
+        started = time.monotonic()
+        deadline = started + self.timeout
+        acquired = False
+        self.metrics["waiting"] += 1
+        try:
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), self.timeout)
+                acquired = True
+                await self.requests.acquire(1, deadline)
+                await self.tokens.acquire(estimated_tokens, deadline)
+            except asyncio.TimeoutError:
+                self._reject("timeout")
+            finally:
+                self.metrics["waiting"] -= 1
+
+            waited = time.monotonic() - started
+            self.metrics["admitted"] += 1
+            self.metrics["total_wait_time"] += waited
+            self.metrics["max_wait_time"] = max(self.metrics["max_wait_time"], waited)
+            self.metrics["in_flight"] += 1
+            try:
+                yield self
+            finally:
+                self.metrics["in_flight"] -= 1
+        finally:
+            if acquired:
+                self.semaphore.release()
+            if user_id is not None:
+                self.user_in_flight[user_id] -= 1
+                if not self.user_in_flight[user_id]:
+                    del self.user_in_flight[user_id]
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """Reconcile the token bucket with the tokens a call really used"""
+        self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def stats(self) -> Dict:
+        """Admission counters for monitoring"""
+        admitted = self.metrics["admitted"]
+        return {
+            **self.metrics,
+            "rejected": dict(self.metrics["rejected"]),
+            "avg_wait_time": self.metrics["total_wait_time"] / admitted if admitted else 0,
+        }
@@ -0,0 +1,125 @@
+import bisect
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# USD per 1M tokens
+MODEL_PRICING = {
+    "gpt-4o-mini": {"prompt": 0.15, "cached": 0.075, "completion": 0.60},
+    "gpt-4o": {"prompt": 2.50, "cached": 1.25, "completion": 10.00},
+}
+
+# Upper bounds in seconds; the last bucket catches everything slower
+LATENCY_BUCKETS = [
+    0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.75, 1.0,
+    1.5, 2.0, 3.0, 4.0, 6.0, 8.0, 12.0, 16.0, 24.0, 32.0, float("inf"),
+]
+
+
+@dataclass
+class LLMCallRecord:
+    handler: str
+    model: str
+    outcome: str
+    wall_time: float
+    time_to_first_token: Optional[float] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def cost(self) -> float:
+        """Dollar cost of the call from MODEL_PRICING"""
+        pricing = MODEL_PRICING.get(self.model)
+        if not pricing:
+            return 0.0
+        uncached = self.prompt_tokens - self.cached_tokens
+        return (
+            uncached * pricing["prompt"]
+            + self.cached_tokens * pricing["cached"]
+            + self.completion_tokens * pricing["completion"]
+        ) / 1_000_000
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram with percentile estimates"""
+
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile"""
+        if not self.total:
+            return 0.0
+        rank = p / 100 * self.total
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.total,
+            "avg": self.sum / self.total if self.total else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+@dataclass
+class HandlerStats:
+    wall_time: LatencyHistogram = field(default_factory=LatencyHistogram)
+    time_to_first_token: LatencyHistogram = field(default_factory=LatencyHistogram)
+    messages: int = 0
+    outcomes: Dict[str, int] = field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+
+
+class LLMMetrics:
+    """Aggregates LLMCallRecords per handler"""
+
+    def __init__(self):
+        self.handlers: Dict[str, HandlerStats] = {}
+
+    def record(self, record: LLMCallRecord):
+        stats = self.handlers.setdefault(record.handler, HandlerStats())
+        stats.messages += 1
+        stats.outcomes[record.outcome] = stats.outcomes.get(record.outcome, 0) + 1
+        stats.prompt_tokens += record.prompt_tokens
+        stats.completion_tokens += record.completion_tokens
+        stats.cached_tokens += record.cached_tokens
+        stats.cost += record.cost
+        # Only real upstream calls belong in the latency distributions
+        if record.outcome == "ok":
+            stats.wall_time.observe(record.wall_time)
+            if record.time_to_first_token is not None:
+                stats.time_to_first_token.observe(record.time_to_first_token)
+
+    def summary(self) -> Dict:
+        return {
+            handler: {
+                "messages": stats.messages,
+                "outcomes": dict(stats.outcomes),
+                "wall_time": stats.wall_time.summary(),
+                "time_to_first_token": stats.time_to_first_token.summary(),
+                "prompt_tokens": stats.prompt_tokens,
+                "completion_tokens": stats.completion_tokens,
+                "cached_tokens": stats.cached_tokens,
+                "cost_usd": stats.cost,
+                "cost_per_1k_messages": stats.cost / stats.messages * 1000,
+            }
+            for handler, stats in self.handlers.items()
+        }
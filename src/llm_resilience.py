@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Tuple, Type, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is refusing calls"""
+
+
+class CircuitBreaker:
+    """Trips after repeated failures and lets a trial call through after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being short-circuited"""
+        return (
+            self.state != self.CLOSED
+            and time.monotonic() - self.opened_at < self.reset_timeout
+        )
+
+    def allow_request(self) -> bool:
+        """Whether a call may go upstream right now"""
+        if self.state == self.CLOSED:
+            return True
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        # Cool-down over: let one trial call through (another if it never reports back)
+        self.state = self.HALF_OPEN
+        self.opened_at = time.monotonic()
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+                logger.warning(f"Circuit breaker opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """Bounded retries with jittered backoff under a per-request deadline"""
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        retry_on: Tuple[Type[BaseException], ...] = (),
+        max_retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 4.0,
+        deadline: float = 20.0,
+    ):
+        self.breaker = breaker
+        self.retry_on = (asyncio.TimeoutError,) + tuple(retry_on)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.metrics = {"calls": 0, "retries": 0, "failures": 0, "short_circuited": 0}
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    async def call(self, make_call: Callable[[], Awaitable[T]]) -> T:
+        """Run make_call, retrying transient errors until the deadline"""
+        if not self.breaker.allow_request():
+            self.metrics["short_circuited"] += 1
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+        self.metrics["calls"] += 1
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                result = await asyncio.wait_for(make_call(), deadline - time.monotonic())
+                self.breaker.record_success()
+                return result
+            except self.retry_on as e:
+                self.breaker.record_failure()
+                delay = self._backoff(attempt)
+                attempt += 1
+                if (
+                    attempt > self.max_retries
+                    or self.breaker.state == CircuitBreaker.OPEN
+                    or time.monotonic() + delay >= deadline
+                ):
+                    self.metrics["failures"] += 1
+                    raise
+                self.metrics["retries"] += 1
+                logger.warning(f"LLM call failed ({e!r}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except Exception:
+                # Upstream answered (e.g. a 400), so it is healthy; don't retry
+                self.breaker.record_success()
+                raise
+
+    def stats(self) -> Dict:
+        return {
+            **self.metrics,
+            "breaker_state": self.breaker.state,
+            "breaker_trips": self.breaker.trips,
+        }
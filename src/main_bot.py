@@ -12,9 +12,13 @@ openai.api_key = os.environ.get("OPENAI_API_KEY")
 
 
 import asyncio
+import json
 import logging
 import os
+import sqlite3
 import sys
+import time
+from contextlib import closing
 
 # Load environment variables FIRST
 from dotenv import load_dotenv
@@ -32,9 +36,16 @@ if not BOT_TOKEN:
     logger.error("TELEGRAM_BOT_TOKEN not found in .env file")
     sys.exit(1)
 logger.info("Using BOT_TOKEN from environment variables")
+
+# Streaming replies: edit a placeholder as tokens arrive, at most once per interval
+STREAM_REPLIES = os.getenv("STREAM_REPLIES", "true").lower() == "true"
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
 # Try importing telegram bot
 try:
     from telegram import Update
+    from telegram.error import BadRequest, RetryAfter
     from telegram.ext import (
         Application,
         CommandHandler,
@@ -48,7 +59,28 @@ except ImportError:
     )
     sys.exit(1)
 
-from openai_handler import TwiNailzAI
+from activity_tracker import ActivityTracker
+from config import (
+    ACTIVITY_FLUSH_SECONDS,
+    CACHE_DIR,
+    CACHE_MAX_BYTES,
+    CACHE_MEMORY_ENTRIES,
+    CACHE_POLICY,
+    CONTEXT_MAX_TURNS,
+    CONTEXT_TOKEN_BUDGET,
+    DATABASE_SHARDS,
+    DATABASE_URL,
+    DEBUG_MODE,
+    INTENT_ROUTER_THRESHOLD,
+    STRUCTURED_RECOMMENDATIONS,
+)
+from conversation_context import ConversationMemory
+from database_sharded import create_async_database
+from db_schema import assert_query_plans
+from intent_router import IntentRouter
+from nail_features import nail_features
+from openai_handler import INTERRUPTED_MESSAGE, AsyncTwiNailzAI
+from tech_stack import CacheManager, DatabaseManager, PerformanceMonitor
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -63,12 +95,30 @@ class TwiNailzBot:
     def __init__(self, token: str):
         self.token = token
         self.application = None
-        self.nail_ai = TwiNailzAI()
+        self.db = create_async_database(DATABASE_URL, DATABASE_SHARDS)
+        self.activity = ActivityTracker(self.db, ACTIVITY_FLUSH_SECONDS)
+        self.memory = ConversationMemory(
+            self.db, max_turns=CONTEXT_MAX_TURNS, token_budget=CONTEXT_TOKEN_BUDGET
+        )
+        self.cache = CacheManager(
+            CACHE_DIR, CACHE_MAX_BYTES, CACHE_MEMORY_ENTRIES, CACHE_POLICY
+        )
+        self.monitor = PerformanceMonitor(DatabaseManager(DATABASE_URL), cache=self.cache)
+        self.nail_ai = AsyncTwiNailzAI(
+            trends_cache=self.cache, memory=self.memory, monitor=self.monitor
+        )
+        self.router = IntentRouter(INTENT_ROUTER_THRESHOLD)
+        self.monitor.register_stats("llm_admission", self.nail_ai.admission.stats)
+        self.monitor.register_stats("llm_resilience", self.nail_ai.resilience.stats)
+        self.monitor.register_stats("similarity_cache", self.nail_ai.similarity_cache.stats)
+        self.monitor.register_stats("structured_cache", self.nail_ai.structured_cache.stats)
+        self.monitor.register_stats("intent_router", self.router.stats)
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
         if not update.message:
             return
+        self.activity.touch_user(update.effective_user)
 
         welcome_message = """
 🌟 Welcome to TwiNailz.AI! 🌟
@@ -125,13 +175,46 @@ What specific nail concern can I help you with?
         """Handle regular text messages with AI"""
         if update.message and update.message.text:
             user_message = update.message.text
-        
+            self.activity.touch_user(update.effective_user)
+
+            # Clear-cut intents get a canned answer without an LLM call
+            decision = self.router.route(user_message)
+            if not decision.needs_llm:
+                await update.message.reply_text(decision.response, parse_mode="Markdown")
+                await self.memory.record(
+                    update.effective_user.id, user_message, decision.response, "twinailz"
+                )
+                return
+
+            # A design card only fits requests naming an occasion, style or colors
+            if STRUCTURED_RECOMMENDATIONS and nail_features.is_design_request(user_message):
+                await update.message.reply_chat_action("typing")
+                recommendation = await self.nail_ai.get_structured_recommendation(
+                    user_message, update.effective_user.id
+                )
+                if recommendation:
+                    text = nail_features.render_recommendation(recommendation)
+                    await update.message.reply_text(text, parse_mode="Markdown")
+                    await self.memory.record(
+                        update.effective_user.id,
+                        user_message,
+                        text,
+                        recommendation.personality_source,
+                    )
+                    return
+
+            if STREAM_REPLIES:
+                await self.stream_reply(update, user_message)
+                return
+
             # Show typing indicator
             await update.message.reply_chat_action("typing")
         
             try:
                 # Get AI response
-                response = self.nail_ai.get_nail_recommendation(user_message)
+                response = await self.nail_ai.get_nail_recommendation(
+                    user_message, update.effective_user.id
+                )
                 await update.message.reply_text(f"💅 {response}")
             except Exception as e:
                 # Fallback to basic response
@@ -141,6 +224,60 @@ What specific nail concern can I help you with?
                     response = f"Thanks for your message! I'm TwiNailz.AI 💅\n\nUse /help to see what I can do for you!"
                     await update.message.reply_text(response)
 
+    async def stream_reply(self, update: Update, user_message: str):
+        """Stream the AI reply into a placeholder message with coalesced edits"""
+        started = time.monotonic()
+        placeholder = await update.message.reply_text("💅 ...")
+
+        text = ""
+        shown = initial = placeholder.text
+        next_edit_at = started
+        try:
+            async for chunk in self.nail_ai.stream_nail_recommendation(
+                user_message, update.effective_user.id
+            ):
+                text += chunk
+                now = time.monotonic()
+                if now < next_edit_at:
+                    continue
+                first_edit = shown == initial
+                shown, delay = await self._edit_reply(placeholder, f"💅 {text}", shown)
+                if first_edit and shown != initial:
+                    logger.info(f"Time to first visible text: {time.monotonic() - started:.3f}s")
+                next_edit_at = time.monotonic() + max(delay, STREAM_EDIT_INTERVAL)
+        except Exception as e:
+            logger.error(f"Streaming reply failed: {e}")
+            if not text:
+                text = "Thanks for your message! I'm TwiNailz.AI 💅\n\nUse /help to see what I can do for you!"
+            elif not text.endswith(INTERRUPTED_MESSAGE):
+                text += INTERRUPTED_MESSAGE
+
+        # Final edit always lands, waiting out any flood control
+        while True:
+            shown, delay = await self._edit_reply(placeholder, f"💅 {text}", shown)
+            if not delay:
+                break
+            await asyncio.sleep(delay)
+        logger.info(f"Streamed reply completed in {time.monotonic() - started:.3f}s")
+
+    async def _edit_reply(self, message, text: str, shown: str):
+        """Edit message to text, returning the shown text and any retry delay"""
+        text = text[:TELEGRAM_MAX_MESSAGE_LENGTH]
+        if text == shown:
+            return shown, 0
+        try:
+            await message.edit_text(text)
+            return text, 0
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            if not isinstance(retry_after, (int, float)):
+                retry_after = retry_after.total_seconds()
+            return shown, retry_after
+        except BadRequest as e:
+            # "Message is not modified" and friends; keep streaming
+            logger.warning(f"Could not edit streamed reply: {e}")
+            return shown, 0
+
     async def trends_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /trends command with AI"""
         if not update.message:
@@ -149,11 +286,23 @@ What specific nail concern can I help you with?
         await update.message.reply_text("🔍 Getting the latest nail trends for you...")
     
         try:
-            trends = self.nail_ai.get_nail_trends()
+            trends = await self.nail_ai.get_nail_trends()
             await update.message.reply_text(f"✨ Current Nail Trends:\n\n{trends}")
         except Exception as e:
             await update.message.reply_text("Sorry, I couldn't get trends right now. Please try again later!")
 
+    async def cachestats_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /cachestats command (DEBUG_MODE only): dump cache and LLM stats"""
+        if not update.message:
+            return
+
+        stats = await self.monitor.get_system_health()
+        logger.info(f"Cache stats: {json.dumps(stats)}")
+        dump = json.dumps(stats, indent=1)
+        await update.message.reply_text(
+            f"```\n{dump[: TELEGRAM_MAX_MESSAGE_LENGTH - 8]}\n```", parse_mode="Markdown"
+        )
+
     def setup_handlers(self):
         """Setup command and message handlers"""
         if not self.application:
@@ -163,16 +312,50 @@ What specific nail concern can I help you with?
         self.application.add_handler(CommandHandler("help", self.help_command))
         self.application.add_handler(CommandHandler("advice", self.advice_command))
         self.application.add_handler(CommandHandler("trends", self.trends_command))
+        if DEBUG_MODE:
+            self.application.add_handler(
+                CommandHandler("cachestats", self.cachestats_command)
+            )
         # Add message handler
         self.application.add_handler(
             MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message)
         )
 
+    async def startup(self, application: Application):
+        """Prepare resources before polling starts"""
+        await self.db.init_database()
+        # DATABASE_URL also holds user_interactions and interactions when sharded;
+        # sqlite3's own context manager only commits, closing() releases the file
+        for path in dict.fromkeys([DATABASE_URL, *self.db.paths]):
+            with closing(sqlite3.connect(path)) as conn:
+                assert_query_plans(conn)
+        self.activity.start()
+        self.cache.start_expiry()
+
+    async def shutdown(self, application: Application):
+        """Release resources held by the bot"""
+        await self.nail_ai.close()
+        await self.activity.close()
+        await self.cache.stop_expiry()
+        self.cache.close()
+        await self.monitor.flush_analytics()
+        self.monitor.db.close()
+        # Flushes queued conversation writes before closing the connection
+        await self.db.close()
+
     def run(self):
         """Run the bot"""
         try:
             # Create application
-            self.application = Application.builder().token(self.token).build()
+            # concurrent_updates lets one chat's LLM call overlap with others
+            self.application = (
+                Application.builder()
+                .token(self.token)
+                .concurrent_updates(True)
+                .post_init(self.startup)
+                .post_shutdown(self.shutdown)
+                .build()
+            )
         
             # Setup handlers
             self.setup_handlers()
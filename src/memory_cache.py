@@ -0,0 +1,283 @@
+import logging
+import random
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LRUPolicy:
+    """Evict the least recently used key"""
+
+    def __init__(self):
+        self.order: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def record(self, key: Hashable):
+        """Note a lookup, hit or miss"""
+
+    def access(self, key: Hashable):
+        self.order.move_to_end(key)
+
+    def insert(self, key: Hashable):
+        self.order[key] = None
+
+    def remove(self, key: Hashable):
+        self.order.pop(key, None)
+
+    def victim(self) -> Optional[Hashable]:
+        return next(iter(self.order), None)
+
+    def admit(self, candidate: Hashable, victim: Hashable) -> bool:
+        return True
+
+
+class LFUPolicy:
+    """Evict the least frequently used key, oldest first among ties; O(1) per operation"""
+
+    def __init__(self):
+        self.freq: Dict[Hashable, int] = {}
+        self.buckets: Dict[int, "OrderedDict[Hashable, None]"] = {}
+        self.min_freq = 0
+
+    def record(self, key: Hashable):
+        pass
+
+    def _unlink(self, key: Hashable) -> int:
+        count = self.freq.pop(key)
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+        return count
+
+    def access(self, key: Hashable):
+        count = self._unlink(key)
+        if self.min_freq == count and count not in self.buckets:
+            self.min_freq = count + 1
+        self.freq[key] = count + 1
+        self.buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+    def insert(self, key: Hashable):
+        self.freq[key] = 1
+        self.buckets.setdefault(1, OrderedDict())[key] = None
+        self.min_freq = 1
+
+    def remove(self, key: Hashable):
+        if key not in self.freq:
+            return
+        count = self._unlink(key)
+        if count == self.min_freq and count not in self.buckets:
+            self.min_freq = min(self.buckets, default=0)
+
+    def victim(self) -> Optional[Hashable]:
+        bucket = self.buckets.get(self.min_freq)
+        return next(iter(bucket), None) if bucket else None
+
+    def admit(self, candidate: Hashable, victim: Hashable) -> bool:
+        return True
+
+
+class FrequencySketch:
+    """Count-min sketch with counters capped at 15 that halve as they age"""
+
+    def __init__(self, capacity: int, depth: int = 4):
+        width = 1
+        while width < max(capacity, 16):
+            width <<= 1
+        self.mask = width - 1
+        self.depth = depth
+        self.rows = [array("B", bytes(width)) for _ in range(depth)]
+        self.seeds = [random.getrandbits(32) for _ in range(depth)]
+        self.sample_size = 10 * capacity
+        self.additions = 0
+
+    def _indexes(self, key: Hashable):
+        for row, seed in zip(self.rows, self.seeds):
+            yield row, hash((seed, key)) & self.mask
+
+    def increment(self, key: Hashable):
+        for row, index in self._indexes(key):
+            if row[index] < 15:
+                row[index] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+
+    def estimate(self, key: Hashable) -> int:
+        return min(row[index] for row, index in self._indexes(key))
+
+    def _age(self):
+        """Halve every counter so old popularity fades"""
+        for row in self.rows:
+            for i, value in enumerate(row):
+                row[i] = value >> 1
+        self.additions //= 2
+
+
+class TinyLFUPolicy(LRUPolicy):
+    """LRU order with TinyLFU admission: a new key only displaces the LRU
+    victim if it has been requested more often recently"""
+
+    def __init__(self, capacity: int):
+        super().__init__()
+        self.sketch = FrequencySketch(capacity)
+
+    def record(self, key: Hashable):
+        self.sketch.increment(key)
+
+    def admit(self, candidate: Hashable, victim: Hashable) -> bool:
+        return self.sketch.estimate(candidate) > self.sketch.estimate(victim)
+
+
+POLICIES = ("lru", "lfu", "tinylfu")
+
+
+def make_policy(name: str, capacity: int):
+    if name == "lru":
+        return LRUPolicy()
+    if name == "lfu":
+        return LFUPolicy()
+    if name == "tinylfu":
+        return TinyLFUPolicy(capacity)
+    raise ValueError(f"Unknown eviction policy {name!r}; expected one of {POLICIES}")
+
+
+class MemoryCache:
+    """Entry-bounded TTL cache with a pluggable eviction policy.
+
+    Expiry times are filed in a timer wheel of resolution-second slots,
+    so expire() touches only the slots that have come due and the entries
+    in them, never the whole cache. CacheManager calls it from a
+    background task.
+    """
+
+    def __init__(self, max_entries: int = 10000, policy: str = "lru", resolution: float = 1.0):
+        self.max_entries = max_entries
+        self.policy_name = policy
+        self.policy = make_policy(policy, max_entries)
+        self.entries: Dict[Hashable, Tuple[Any, float]] = {}
+        # Caller-supplied entry sizes, kept current as entries come and go
+        self.sizes: Dict[Hashable, int] = {}
+        self.bytes = 0
+        self.resolution = resolution
+        self.wheel: Dict[int, List[Tuple[Hashable, float]]] = {}
+        self.wheel_slots = 0
+        self.cursor = int(time.time() // resolution)
+        # Optional callback receiving the keys of evicted entries
+        self.on_evict = None
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "rejections": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable, now: float = None) -> Optional[Any]:
+        """Return a live value or None"""
+        entry = self.get_entry(key, now)
+        return entry[0] if entry else None
+
+    def get_entry(self, key: Hashable, now: float = None) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) for a live key or None"""
+        self.policy.record(key)
+        entry = self.entries.get(key)
+        if entry is None or entry[1] <= (now or time.time()):
+            if entry is not None:
+                self._remove(key)
+                self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+        self.policy.access(key)
+        self.stats["hits"] += 1
+        return entry
+
+    def set(self, key: Hashable, value: Any, expires_at: float, size: int = 0) -> bool:
+        """Store a value; returns False if the admission policy rejected it"""
+        if key in self.entries:
+            self.policy.access(key)
+        else:
+            if len(self.entries) >= self.max_entries:
+                victim = self.policy.victim()
+                if victim is not None:
+                    if not self.policy.admit(key, victim):
+                        self.stats["rejections"] += 1
+                        return False
+                    self._remove(victim)
+                    self.stats["evictions"] += 1
+                    if self.on_evict:
+                        self.on_evict([victim])
+            self.policy.insert(key)
+        self.entries[key] = (value, expires_at)
+        self.bytes += size - self.sizes.get(key, 0)
+        self.sizes[key] = size
+        self._schedule(key, expires_at)
+        if self.wheel_slots > 2 * len(self.entries) + 64:
+            self._compact()
+        return True
+
+    def _schedule(self, key: Hashable, expires_at: float):
+        tick = max(int(expires_at // self.resolution), self.cursor)
+        self.wheel.setdefault(tick, []).append((key, expires_at))
+        self.wheel_slots += 1
+
+    def delete(self, key: Hashable):
+        if key in self.entries:
+            self._remove(key)
+
+    def _remove(self, key: Hashable):
+        del self.entries[key]
+        self.bytes -= self.sizes.pop(key, 0)
+        self.policy.remove(key)
+
+    def _compact(self):
+        """Drop wheel slots left behind by overwrites and evictions"""
+        self.wheel = {}
+        self.wheel_slots = 0
+        for key, (_, expires) in self.entries.items():
+            self._schedule(key, expires)
+
+    def _expire_slot(self, slot: List[Tuple[Hashable, float]], now: float) -> int:
+        removed = 0
+        for key, expires in slot:
+            entry = self.entries.get(key)
+            # Skip slots superseded by a later set() or an eviction
+            if entry is not None and entry[1] == expires and expires <= now:
+                self._remove(key)
+                removed += 1
+        return removed
+
+    def expire(self, now: float = None) -> int:
+        """Remove every entry whose TTL has passed; returns how many"""
+        now = now or time.time()
+        current = int(now // self.resolution)
+        if current - self.cursor > len(self.wheel):
+            # Long idle gap: visit the occupied ticks rather than every tick
+            due = sorted(tick for tick in self.wheel if tick < current)
+        else:
+            due = [tick for tick in range(self.cursor, current) if tick in self.wheel]
+        removed = 0
+        for tick in due:
+            slot = self.wheel.pop(tick)
+            self.wheel_slots -= len(slot)
+            removed += self._expire_slot(slot, now)
+        self.cursor = max(self.cursor, current)
+
+        # The current tick is only partly due
+        slot = self.wheel.get(current)
+        if slot:
+            removed += self._expire_slot(slot, now)
+            remaining = [
+                (key, expires)
+                for key, expires in slot
+                if key in self.entries and self.entries[key][1] == expires
+            ]
+            self.wheel_slots -= len(slot) - len(remaining)
+            self.wheel[current] = remaining
+        self.stats["expirations"] += removed
+        return removed
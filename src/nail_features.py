@@ -1,8 +1,14 @@
 import random
+import re
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List
+from functools import partial
+from typing import Dict, List, Tuple
+
+from telegram.helpers import escape_markdown
+
+from constants import BOT_SIGNATURE
 
 
 class NailShape(Enum):
@@ -38,6 +44,46 @@ class NailRecommendation:
     personality_source: str
 
 
+OCCASION_KEYWORDS = {
+    Occasion.WORK: ["work", "office", "professional", "meeting", "job", "interview"],
+    Occasion.PARTY: ["party", "birthday", "celebration", "club", "festival"],
+    Occasion.WEDDING: ["wedding", "bride", "bridal", "bridesmaid", "ceremony"],
+    Occasion.DATE: ["date", "romantic", "dinner", "anniversary", "valentine"],
+    Occasion.VACATION: ["vacation", "beach", "holiday", "summer", "travel"],
+    Occasion.FORMAL: ["formal", "gala", "prom", "black tie"],
+}
+
+ELEGANT_KEYWORDS = ["elegant", "classy", "subtle", "minimal", "nude", "classic", "natural"]
+
+REQUEST_COLORS = [
+    "red", "pink", "nude", "black", "white", "blue", "green", "purple",
+    "gold", "silver", "burgundy", "coral", "lavender", "yellow", "orange",
+]
+
+RECOMMENDATION_TEMPLATES = {
+    "lumi": """🌟 **Lumi's suggestion: {design_name}**
+
+{description}
+
+🎨 **Colors:** {colors}
+💅 **Shape:** {shape} · **Finish:** {finish}
+✨ **Perfect for:** {occasion} · **Difficulty:** {difficulty}/5
+
+**Lumi's care ritual:**
+{care_tips}""",
+    "zae": """🔥 **Zae's pick: {design_name}!**
+
+{description}
+
+🎨 **Colors:** {colors}
+💅 **Shape:** {shape} · **Finish:** {finish}
+💥 **Wear it to:** {occasion} · **Difficulty:** {difficulty}/5
+
+**Zae's keep-it-fresh tips:**
+{care_tips}""",
+}
+
+
 class TwiNailzFeatures:
     """Complete nail expertise system"""
 
@@ -86,6 +132,81 @@ class TwiNailzFeatures:
             personality_source=personality,
         )
 
+    def classify_request(self, message: str) -> Tuple[str, str, List[str]]:
+        """Extract occasion, style and colors, the parts a recommendation depends on"""
+        message_lower = message.lower()
+        occasion = Occasion.EVERYDAY
+        for candidate, keywords in OCCASION_KEYWORDS.items():
+            if any(re.search(rf"\b{keyword}\b", message_lower) for keyword in keywords):
+                occasion = candidate
+                break
+
+        style = "elegant" if any(k in message_lower for k in ELEGANT_KEYWORDS) else "bold"
+        colors = [c for c in REQUEST_COLORS if re.search(rf"\b{c}\b", message_lower)]
+        return occasion.value, style, colors
+
+    def is_design_request(self, message: str) -> bool:
+        """True if classify_request finds an occasion, a style or colors to design for"""
+        occasion, style, colors = self.classify_request(message)
+        return occasion != Occasion.EVERYDAY.value or style == "elegant" or bool(colors)
+
+    @staticmethod
+    def _as_list(value) -> List[str]:
+        """A JSON list field as strings; a lone string or number is one item"""
+        if not value:
+            return []
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+        return [str(item) for item in value if item]
+
+    def parse_recommendation(self, data: Dict, personality: str) -> NailRecommendation:
+        """Build a NailRecommendation from the LLM's JSON, tolerating bad values"""
+        try:
+            shape = NailShape(str(data.get("shape", "")).lower())
+        except ValueError:
+            shape = NailShape.OVAL
+        try:
+            occasion = Occasion(str(data.get("occasion", "")).lower())
+        except ValueError:
+            occasion = Occasion.EVERYDAY
+        try:
+            difficulty = min(5, max(1, int(data.get("difficulty", 2))))
+        except (TypeError, ValueError):
+            difficulty = 2
+
+        return NailRecommendation(
+            design_name=str(data.get("design_name") or "Signature Glow"),
+            colors=self._as_list(data.get("colors"))[:3],
+            shape=shape,
+            finish=str(data.get("finish") or "glossy"),
+            difficulty=difficulty,
+            occasion=occasion,
+            description=str(data.get("description") or ""),
+            care_tips=self._as_list(data.get("care_tips"))[:3],
+            personality_source=personality,
+        )
+
+    def render_recommendation(self, recommendation: NailRecommendation) -> str:
+        """Render a recommendation with its personality's template"""
+        template = RECOMMENDATION_TEMPLATES.get(
+            recommendation.personality_source, RECOMMENDATION_TEMPLATES["lumi"]
+        )
+        care_tips = recommendation.care_tips or ["Apply base coat", "Use cuticle oil daily"]
+        # Model-written fields go into a Markdown reply; a stray "_" or "*"
+        # would make Telegram reject the whole message
+        escape = partial(escape_markdown, version=1)
+        text = template.format(
+            design_name=escape(recommendation.design_name),
+            description=escape(recommendation.description),
+            colors=escape(", ".join(recommendation.colors)) or "your favorite shade",
+            shape=recommendation.shape.value.title(),
+            finish=escape(recommendation.finish),
+            occasion=recommendation.occasion.value,
+            difficulty=recommendation.difficulty,
+            care_tips="\n".join(f"• {escape(tip)}" for tip in care_tips),
+        )
+        return text + BOT_SIGNATURE
+
     def _get_current_season(self) -> str:
         month = datetime.now().month
         if month in [3, 4, 5]:
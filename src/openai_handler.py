@@ -1,52 +1,401 @@
+import json
+import logging
 import os
-from openai import OpenAI
+import time
+from openai import (
+    APIConnectionError,
+    AsyncOpenAI,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
 from dotenv import load_dotenv
 
+from config import (
+    CACHE_DIR,
+    LLM_ADMISSION_TIMEOUT,
+    LLM_BREAKER_FAILURES,
+    LLM_BREAKER_RESET_SECONDS,
+    LLM_CACHE_PATH,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_PER_USER_CONCURRENCY,
+    LLM_REQUEST_DEADLINE,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    SIMILARITY_CACHE_SIZE,
+    SIMILARITY_CACHE_THRESHOLD,
+    STRUCTURED_CACHE_TTL_MINUTES,
+    TRENDS_CACHE_TTL_MINUTES,
+    TRENDS_STALE_MINUTES,
+)
+from conversation_context import needs_history
+from llm_cache import ResponseCache
+from llm_limiter import AdmissionRejected, LLMAdmission
+from llm_metrics import LLMCallRecord
+from llm_resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+from nail_features import NailShape, Occasion, nail_features
+from semantic_cache import SimilarityCache
+from tech_stack import CacheManager
+
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+MODEL = "gpt-4o-mini"
+# Completion tokens reserved per call before the real usage is known
+COMPLETION_TOKEN_ESTIMATE = 500
+BUSY_MESSAGE = "I'm a little swamped right now 💅 Please try again in a moment!"
+# Appended to a streamed reply that broke off after some text was sent
+INTERRUPTED_MESSAGE = "\n\n(Reply interrupted, please try again.)"
+# Transient OpenAI errors worth retrying (timeouts are covered by APIConnectionError)
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+RECOMMENDATION_SYSTEM_PROMPT = "You are TwiNailz AI, an expert nail artist and trend advisor. Provide creative, trendy nail design recommendations, color suggestions, and nail care tips. Keep responses engaging and fashionable."
+TRENDS_SYSTEM_PROMPT = "You are TwiNailz AI. Provide the latest nail trends, popular colors, and seasonal nail designs. Be specific and trendy."
+TRENDS_USER_PROMPT = "What are the current nail trends and popular designs right now?"
+STRUCTURED_SYSTEM_PROMPT = (
+    "You are TwiNailz AI, an expert nail artist. Reply with only a compact JSON object "
+    'with keys: "design_name" (creative, 2-3 words), "colors" (list of up to 3), '
+    f'"shape" (one of {", ".join(s.value for s in NailShape)}), "finish", '
+    '"difficulty" (1-5), '
+    f'"occasion" (one of {", ".join(o.value for o in Occasion)}), '
+    '"description" (max 25 words), "care_tips" (list of up to 2 short tips).'
+)
+STRUCTURED_MAX_TOKENS = 250
+TRENDS_MESSAGES = [
+    {"role": "system", "content": TRENDS_SYSTEM_PROMPT},
+    {"role": "user", "content": TRENDS_USER_PROMPT},
+]
+
+
+def estimate_tokens(messages):
+    """Rough prompt plus completion token estimate (~4 characters per token)"""
+    prompt_chars = sum(len(message["content"]) for message in messages)
+    return prompt_chars // 4 + COMPLETION_TOKEN_ESTIMATE
+
+
 class TwiNailzAI:
     def __init__(self):
         self.client = OpenAI(
             api_key=os.getenv('OPENAI_API_KEY')
         )
-    
+        self.trends_cache = ResponseCache(TRENDS_CACHE_TTL_MINUTES, LLM_CACHE_PATH)
+        self.similarity_cache = SimilarityCache(
+            SIMILARITY_CACHE_THRESHOLD, SIMILARITY_CACHE_SIZE
+        )
+
     def get_nail_recommendation(self, user_prompt):
         """Get AI-powered nail recommendations"""
+        cached = self.similarity_cache.get(user_prompt)
+        if cached is not None:
+            return cached
         try:
             completion = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+                model=MODEL,
                 messages=[
                     {
-                        "role": "system", 
-                        "content": "You are TwiNailz AI, an expert nail artist and trend advisor. Provide creative, trendy nail design recommendations, color suggestions, and nail care tips. Keep responses engaging and fashionable."
+                        "role": "system",
+                        "content": RECOMMENDATION_SYSTEM_PROMPT
                     },
                     {
-                        "role": "user", 
+                        "role": "user",
                         "content": user_prompt
                     }
                 ]
             )
-            return completion.choices[0].message.content
+            recommendation = completion.choices[0].message.content
+            self.similarity_cache.put(user_prompt, recommendation)
+            return recommendation
         except Exception as e:
             return f"Sorry, I couldn't process your request: {str(e)}"
-    
+
     def get_nail_trends(self):
         """Get current nail trends"""
+        cache_key = ResponseCache.make_key(MODEL, TRENDS_MESSAGES)
+        cached = self.trends_cache.get(cache_key)
+        if cached is not None:
+            return cached
         try:
             completion = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are TwiNailz AI. Provide the latest nail trends, popular colors, and seasonal nail designs. Be specific and trendy."
-                    },
-                    {
-                        "role": "user",
-                        "content": "What are the current nail trends and popular designs right now?"
-                    }
-                ]
+                model=MODEL,
+                messages=TRENDS_MESSAGES
+            )
+            trends = completion.choices[0].message.content
+            self.trends_cache.set(cache_key, trends)
+            return trends
+        except Exception as e:
+            return f"Sorry, I couldn't get trends: {str(e)}"
+
+
+class AsyncTwiNailzAI:
+    """Non-blocking TwiNailzAI for use inside the bot's event loop"""
+
+    def __init__(
+        self,
+        client=None,
+        trends_cache=None,
+        similarity_cache=None,
+        admission=None,
+        resilience=None,
+        structured_cache=None,
+        memory=None,
+        monitor=None,
+    ):
+        # Retries and deadlines are owned by ResilientCaller, not the SDK
+        self.client = client or AsyncOpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            max_retries=0,
+            timeout=LLM_REQUEST_DEADLINE,
+        )
+        # CacheManager: one upstream call per refresh window, stale-while-revalidate
+        self._trends_cache = trends_cache
+        self.similarity_cache = similarity_cache or SimilarityCache(
+            SIMILARITY_CACHE_THRESHOLD, SIMILARITY_CACHE_SIZE
+        )
+        self.admission = admission or LLMAdmission(
+            max_concurrency=LLM_MAX_CONCURRENCY,
+            requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+            per_user_concurrency=LLM_PER_USER_CONCURRENCY,
+            timeout=LLM_ADMISSION_TIMEOUT,
+        )
+        self.resilience = resilience or ResilientCaller(
+            CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS),
+            retry_on=RETRYABLE_ERRORS,
+            max_retries=LLM_MAX_RETRIES,
+            deadline=LLM_REQUEST_DEADLINE,
+        )
+        # Structured answers depend only on occasion/style/colors, so users share them
+        self.structured_cache = structured_cache or ResponseCache(
+            STRUCTURED_CACHE_TTL_MINUTES
+        )
+        # Optional ConversationMemory; without it every prompt is standalone
+        self.memory = memory
+        # Optional PerformanceMonitor that receives an LLMCallRecord per call
+        self.monitor = monitor
+
+    @property
+    def trends_cache(self) -> CacheManager:
+        """The trends CacheManager; the default one opens CACHE_DIR on first use"""
+        if self._trends_cache is None:
+            self._trends_cache = CacheManager(CACHE_DIR)
+        return self._trends_cache
+
+    def _check_breaker(self):
+        """Fail fast, before queueing for admission, while the breaker is open"""
+        if self.resilience.breaker.is_open:
+            self.resilience.metrics["short_circuited"] += 1
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+    def _fallback_recommendation(self, user_prompt, user_id):
+        """Answer from the rule-based brain when the LLM is unavailable"""
+        # Imported lazily: the brain opens its SQLite tables on import
+        from personalities.ai_brain import twinailz_brain
+
+        return twinailz_brain.generate_response(user_id or 0, user_prompt)["response"]
+
+    async def _track(self, handler, started, outcome, usage=None, ttft=None):
+        """Report one call (or cache hit) to the performance monitor"""
+        if self.monitor is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        await self.monitor.track_llm_call(
+            LLMCallRecord(
+                handler=handler,
+                model=MODEL,
+                outcome=outcome,
+                wall_time=time.monotonic() - started,
+                time_to_first_token=ttft,
+                prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+                cached_tokens=getattr(details, "cached_tokens", 0) or 0,
             )
-            return completion.choices[0].message.content
+        )
+
+    @staticmethod
+    def _outcome(error):
+        if isinstance(error, AdmissionRejected):
+            return "rejected"
+        if isinstance(error, CircuitOpenError):
+            return "short_circuited"
+        return "error"
+
+    async def _complete(self, messages, user_id=None, handler="handle_message", **options):
+        """Run a single admitted chat completion without blocking the loop"""
+        started = time.monotonic()
+        estimated = estimate_tokens(messages)
+        try:
+            self._check_breaker()
+            async with self.admission.admit(user_id, estimated):
+                completion = await self.resilience.call(
+                    lambda: self.client.chat.completions.create(
+                        model=MODEL,
+                        messages=messages,
+                        **options,
+                    )
+                )
+        except Exception as e:
+            await self._track(handler, started, self._outcome(e))
+            raise
+        usage = getattr(completion, "usage", None)
+        if usage:
+            self.admission.record_usage(estimated, usage.total_tokens)
+        await self._track(handler, started, "ok", usage, time.monotonic() - started)
+        return completion.choices[0].message.content
+
+    async def _recommendation_messages(self, user_prompt, user_id):
+        """Build the recommendation prompt, with history for follow-up messages"""
+        # Standalone questions go out context-free so their answers can be shared
+        if self.memory is None or user_id is None or not needs_history(user_prompt):
+            return [
+                {"role": "system", "content": RECOMMENDATION_SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt},
+            ]
+        return await self.memory.build_messages(
+            user_id, RECOMMENDATION_SYSTEM_PROMPT, user_prompt
+        )
+
+    async def _remember(self, user_id, user_prompt, recommendation, messages=None):
+        """Record the turn and share it via the similarity cache if context-free"""
+        if messages is not None and len(messages) == 2:
+            self.similarity_cache.put(user_prompt, recommendation)
+        if self.memory is not None and user_id is not None:
+            await self.memory.record(user_id, user_prompt, recommendation, "twinailz")
+
+    def _similar_answer(self, user_prompt, messages):
+        """Cached answer to a paraphrase, only for prompts without history"""
+        # Shared answers were written without context; a follow-up needs its own
+        if len(messages) != 2:
+            return None
+        return self.similarity_cache.get(user_prompt)
+
+    async def get_nail_recommendation(self, user_prompt, user_id=None):
+        """Get AI-powered nail recommendations"""
+        started = time.monotonic()
+        try:
+            messages = await self._recommendation_messages(user_prompt, user_id)
+            cached = self._similar_answer(user_prompt, messages)
+            if cached is None:
+                recommendation = await self._complete(messages, user_id)
+        except AdmissionRejected:
+            return BUSY_MESSAGE
+        except Exception as e:
+            logger.warning(f"LLM unavailable, using rule-based brain: {e!r}")
+            return self._fallback_recommendation(user_prompt, user_id)
+        if cached is not None:
+            await self._track("handle_message", started, "cache_hit")
+            await self._remember(user_id, user_prompt, cached)
+            return cached
+        await self._remember(user_id, user_prompt, recommendation, messages)
+        return recommendation
+
+    async def stream_nail_recommendation(self, user_prompt, user_id=None):
+        """Yield nail recommendation text chunks as the model produces them"""
+        started = time.monotonic()
+        try:
+            messages = await self._recommendation_messages(user_prompt, user_id)
         except Exception as e:
-            return f"Sorry, I couldn't get trends: {str(e)}"
\ No newline at end of file
+            logger.warning(f"Loading history failed, using rule-based brain: {e!r}")
+            yield self._fallback_recommendation(user_prompt, user_id)
+            return
+        cached = self._similar_answer(user_prompt, messages)
+        if cached is not None:
+            await self._track("handle_message", started, "cache_hit")
+            yield cached
+            await self._remember(user_id, user_prompt, cached)
+            return
+
+        parts = []
+        usage = None
+        ttft = None
+        try:
+            self._check_breaker()
+            # The slot is held until the last chunk has been received
+            async with self.admission.admit(user_id, estimate_tokens(messages)):
+                stream = await self.resilience.call(
+                    lambda: self.client.chat.completions.create(
+                        model=MODEL,
+                        messages=messages,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                    )
+                )
+                async for chunk in stream:
+                    # With include_usage the final chunk carries usage and no choices
+                    usage = getattr(chunk, "usage", None) or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if ttft is None:
+                            ttft = time.monotonic() - started
+                        parts.append(chunk.choices[0].delta.content)
+                        yield parts[-1]
+        except AdmissionRejected as e:
+            await self._track("handle_message", started, self._outcome(e))
+            yield BUSY_MESSAGE
+            return
+        except Exception as e:
+            await self._track("handle_message", started, self._outcome(e), usage, ttft)
+            logger.warning(f"LLM stream failed, using rule-based brain: {e!r}")
+            if parts:
+                # Keep the partial answer rather than switching voices mid-reply
+                self.resilience.breaker.record_failure()
+                yield INTERRUPTED_MESSAGE
+            else:
+                yield self._fallback_recommendation(user_prompt, user_id)
+            return
+        await self._track("handle_message", started, "ok", usage, ttft)
+        await self._remember(user_id, user_prompt, "".join(parts), messages)
+
+    async def get_structured_recommendation(self, user_prompt, user_id=None):
+        """Get a NailRecommendation from a compact JSON completion, or None"""
+        occasion, style, colors = nail_features.classify_request(user_prompt)
+        personality = "lumi" if style == "elegant" else "zae"
+        request = f"Occasion: {occasion}. Style: {style}."
+        if colors:
+            request += f" Colors: {', '.join(colors)}."
+        messages = [
+            {"role": "system", "content": STRUCTURED_SYSTEM_PROMPT},
+            {"role": "user", "content": request},
+        ]
+
+        async def fetch():
+            content = await self._complete(
+                messages,
+                user_id,
+                response_format={"type": "json_object"},
+                max_tokens=STRUCTURED_MAX_TOKENS,
+            )
+            data = json.loads(content)
+            if not isinstance(data, dict):
+                raise ValueError("structured recommendation is not a JSON object")
+            return data
+
+        try:
+            data = await self.structured_cache.get_or_fetch(
+                ResponseCache.make_key(MODEL, messages), fetch
+            )
+        except Exception as e:
+            logger.warning(f"Structured recommendation failed: {e!r}")
+            return None
+        return nail_features.parse_recommendation(data, personality)
+
+    async def get_nail_trends(self):
+        """Get current nail trends"""
+        try:
+            # Concurrent /trends callers share one upstream call and its result
+            return await self.trends_cache.get_or_compute(
+                f"trends:{ResponseCache.make_key(MODEL, TRENDS_MESSAGES)}",
+                lambda: self._complete(TRENDS_MESSAGES, handler="trends_command"),
+                TRENDS_CACHE_TTL_MINUTES,
+                TRENDS_STALE_MINUTES,
+                namespace="llm",
+            )
+        except AdmissionRejected:
+            return BUSY_MESSAGE
+        except Exception as e:
+            return f"Sorry, I couldn't get trends: {str(e)}"
+
+    async def close(self):
+        """Close the underlying HTTP client"""
+        await self.client.close()
@@ -1,11 +1,19 @@
+import atexit
 import json
+import logging
+import queue
 import random
 import sqlite3
+import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, List
 
 from config import DATABASE_URL
+from db_schema import INDEXES
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -199,6 +207,160 @@ class NailKnowledgeBase:
         return f"{adj} {end}"
 
 
+INTERACTION_INSERT = """
+    INSERT INTO user_interactions
+    (user_id, request_text, response_text, personality_used, phrases_used, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+PROFILE_UPSERT = """
+    INSERT OR REPLACE INTO user_preferences
+    (user_id, preferred_styles, tone_preference, common_requests, interaction_count, last_seen)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+class InteractionLogger:
+    """Write-behind logger: requests enqueue, a worker thread writes in batches"""
+
+    def __init__(
+        self,
+        db_path: str = DATABASE_URL,
+        max_queue: int = 10000,
+        flush_interval: float = 1.0,
+        max_attempts: int = 3,
+    ):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.interactions = queue.Queue(maxsize=max_queue)
+        # Latest profile row per user; older updates are overwritten, not queued
+        self.profiles: Dict[int, tuple] = {}
+        # Interactions from a failed batch, written ahead of the next one
+        self.retry_rows: List[tuple] = []
+        self.failed_attempts = 0
+        self.dropped = 0
+        self._profiles_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(
+            target=self._run, name="interaction-logger", daemon=True
+        )
+        self._worker.start()
+        atexit.register(self.close)
+
+    def log(self, interaction: tuple, profile: tuple = None):
+        """Queue an interaction row and the user's latest profile row"""
+        try:
+            self.interactions.put_nowait(interaction)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Interaction log queue full, dropping interaction")
+        if profile is not None:
+            with self._profiles_lock:
+                self.profiles[profile[0]] = profile
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write everything queued so far: interactions, then profiles"""
+        with self._write_lock:
+            rows, self.retry_rows = self.retry_rows, []
+            while True:
+                try:
+                    rows.append(self.interactions.get_nowait())
+                except queue.Empty:
+                    break
+            with self._profiles_lock:
+                profiles = list(self.profiles.values())
+                self.profiles.clear()
+            if not rows and not profiles:
+                return
+
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=10)
+            except sqlite3.Error as e:
+                self._requeue(rows, profiles, e)
+                return
+            try:
+                # Separate transactions: a bad profile row must not sink interactions
+                failed_rows, row_error = self._commit_rows(conn, INTERACTION_INSERT, rows)
+                failed_profiles, profile_error = self._commit_rows(
+                    conn, PROFILE_UPSERT, profiles
+                )
+            finally:
+                conn.close()
+            if failed_rows or failed_profiles:
+                self._requeue(failed_rows, failed_profiles, row_error or profile_error)
+            else:
+                self.failed_attempts = 0
+
+    @staticmethod
+    def _commit_rows(conn: sqlite3.Connection, query: str, rows: List[tuple]):
+        """Commit rows in one transaction, replaying singly if one fails.
+
+        Returns the rows that still failed and the last error.
+        """
+        if not rows:
+            return [], None
+        try:
+            conn.executemany(query, rows)
+            conn.commit()
+            return [], None
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.warning(f"Batch commit failed, retrying writes singly: {e}")
+
+        failed, error = [], None
+        for row in rows:
+            try:
+                conn.execute(query, row)
+                conn.commit()
+            except sqlite3.Error as row_error:
+                conn.rollback()
+                failed.append(row)
+                error = row_error
+        return failed, error
+
+    def _requeue(self, rows: List[tuple], profiles: List[tuple], error: Exception):
+        """Keep failed rows for the next flush, dropping them after max_attempts"""
+        self.failed_attempts += 1
+        if self.failed_attempts >= self.max_attempts:
+            self.failed_attempts = 0
+            self.dropped += len(rows)
+            logger.error(
+                f"Dropping {len(rows)} interactions and {len(profiles)} profiles "
+                f"after {self.max_attempts} failed writes: {error}"
+            )
+            return
+
+        logger.warning(
+            f"Failed to write {len(rows)} interactions and {len(profiles)} profiles "
+            f"(attempt {self.failed_attempts}/{self.max_attempts}): {error}"
+        )
+        self.retry_rows = rows
+        with self._profiles_lock:
+            for profile in profiles:
+                # A newer profile logged since the failed flush wins
+                self.profiles.setdefault(profile[0], profile)
+
+    def close(self):
+        """Stop the worker and drain anything still queued"""
+        self._stop.set()
+        self._wake.set()
+        if self._worker.is_alive():
+            self._worker.join()
+        self.flush()
+        # Retry a failed final batch instead of losing it at shutdown
+        while self.retry_rows or self.profiles:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
 class TwiNailzBrain:
     """Main AI brain orchestrating all components"""
 
@@ -208,6 +370,7 @@ class TwiNailzBrain:
         self.knowledge = NailKnowledgeBase()
         self.user_profiles = {}
         self._init_database()
+        self.interaction_logger = InteractionLogger(DATABASE_URL)
 
     def _init_database(self):
         """Initialize SQLite database for interaction logging"""
@@ -242,6 +405,8 @@ class TwiNailzBrain:
         """
         )
 
+        cursor.execute(INDEXES["user_interactions"])
+
         conn.commit()
         conn.close()
 
@@ -322,53 +487,37 @@ class TwiNailzBrain:
         personality: str,
         phrases: List[str],
     ):
-        """Log interaction for learning purposes"""
-        conn = sqlite3.connect(DATABASE_URL)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
-            INSERT INTO user_interactions 
-            (user_id, request_text, response_text, personality_used, phrases_used, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """,
-            (
-                user_id,
-                request,
-                response,
-                personality,
-                json.dumps(phrases),
-                datetime.now(),
-            ),
+        """Log interaction for learning purposes (written behind the request)"""
+        interaction = (
+            user_id,
+            request,
+            response,
+            personality,
+            json.dumps(phrases),
+            datetime.now(),
         )
 
         # Update user profile
+        profile = None
         user_profile = self.user_profiles.get(user_id)
         if user_profile:
             user_profile.interaction_count += 1
             user_profile.last_seen = datetime.now()
-
-            cursor.execute(
-                """
-                INSERT OR REPLACE INTO user_preferences 
-                (user_id, preferred_styles, tone_preference, common_requests, interaction_count, last_seen)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    user_id,
-                    json.dumps(user_profile.preferred_styles),
-                    user_profile.tone_preference,
-                    json.dumps(user_profile.common_requests),
-                    user_profile.interaction_count,
-                    user_profile.last_seen.isoformat(),
-                ),
+            profile = (
+                user_id,
+                json.dumps(user_profile.preferred_styles),
+                user_profile.tone_preference,
+                json.dumps(user_profile.common_requests),
+                user_profile.interaction_count,
+                user_profile.last_seen.isoformat(),
             )
 
-        conn.commit()
-        conn.close()
+        self.interaction_logger.log(interaction, profile)
 
     def learn_from_feedback(self, user_id: int, interaction_id: int, rating: int):
         """Learn from user feedback to improve responses"""
+        # The rated interaction may still be waiting in the write-behind queue
+        self.interaction_logger.flush()
         conn = sqlite3.connect(DATABASE_URL)
         cursor = conn.cursor()
 
@@ -0,0 +1,139 @@
+import re
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+STOPWORDS = {
+    "a", "an", "and", "any", "are", "can", "could", "do", "for", "give", "i",
+    "idea", "ideas", "in", "is", "me", "my", "of", "on", "please", "some",
+    "suggest", "the", "to", "want", "what", "with", "would", "you",
+}
+
+
+class HashingVectorizer:
+    """Local bag-of-words vectorizer using the hashing trick"""
+
+    def __init__(self, n_features: int = 1024):
+        self.n_features = n_features
+
+    def tokenize(self, text: str) -> List[str]:
+        """Normalize a prompt into stemmed content words"""
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        tokens = []
+        for word in words:
+            if word in STOPWORDS:
+                continue
+            # Cheap plural folding so "nails" matches "nail"
+            if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+                word = word[:-1]
+            tokens.append(word)
+        return tokens
+
+    def transform(self, text: str) -> np.ndarray:
+        """Return an L2-normalised feature vector for text"""
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        for token in self.tokenize(text):
+            h = zlib.crc32(token.encode())
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.n_features] += sign
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class SimilarityCache:
+    """LRU cache that serves answers for near-duplicate prompts"""
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        max_entries: int = 1000,
+        vectorizer: Optional[HashingVectorizer] = None,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.vectorizer = vectorizer or HashingVectorizer()
+
+        # Fixed-size matrix bounds memory; each cached prompt owns one row
+        self.vectors = np.zeros(
+            (max_entries, self.vectorizer.n_features), dtype=np.float32
+        )
+        self.slots: "OrderedDict[str, int]" = OrderedDict()
+        self.entries: Dict[int, Tuple[str, str]] = {}
+        self.free_slots = list(range(max_entries - 1, -1, -1))
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _normalize(self, prompt: str) -> str:
+        return " ".join(self.vectorizer.tokenize(prompt))
+
+    def _covers(self, cached_key: str, key: str) -> bool:
+        # A query that adds content words ("red", "short") asks for something
+        # the cached answer never addressed, however close the cosine score
+        return set(key.split()) <= set(cached_key.split())
+
+    def get(self, prompt: str) -> Optional[str]:
+        """Return the cached answer of the most similar prompt above threshold"""
+        key = self._normalize(prompt)
+        if key and self.slots:
+            slot = self.slots.get(key)
+            if slot is None:
+                similarities = self.vectors @ self.vectorizer.transform(prompt)
+                best = int(np.argmax(similarities))
+                if (
+                    similarities[best] >= self.threshold
+                    and best in self.entries
+                    and self._covers(self.entries[best][0], key)
+                ):
+                    slot = best
+            if slot is not None:
+                cached_key, response = self.entries[slot]
+                self.slots.move_to_end(cached_key)
+                self.hits += 1
+                return response
+
+        self.misses += 1
+        return None
+
+    def put(self, prompt: str, response: str):
+        """Cache a response, evicting the least recently used prompt if full"""
+        key = self._normalize(prompt)
+        if not key:
+            return
+
+        slot = self.slots.get(key)
+        if slot is None:
+            if not self.free_slots:
+                _, evicted = self.slots.popitem(last=False)
+                self.vectors[evicted] = 0
+                del self.entries[evicted]
+                self.free_slots.append(evicted)
+                self.evictions += 1
+            slot = self.free_slots.pop()
+            self.vectors[slot] = self.vectorizer.transform(prompt)
+
+        self.slots[key] = slot
+        self.slots.move_to_end(key)
+        self.entries[slot] = (key, response)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict:
+        """Counters for tuning the similarity threshold"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "entries": len(self.slots),
+            "threshold": self.threshold,
+            "vector_bytes": self.vectors.nbytes,
+        }
@@ -1,25 +1,38 @@
 import asyncio
 import hashlib
 import logging
+import math
 import os
-import pickle
+import random
 import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 
 import aiohttp
-import requests
 from bs4 import BeautifulSoup
 
-from config import DATABASE_URL, NAIL_TRENDS_API
+from cache_store import PersistentCacheStore, encode
+from config import (
+    CACHE_DIR,
+    DATABASE_URL,
+    NAIL_TRENDS_API,
+    TRENDS_CACHE_TTL_MINUTES,
+    TRENDS_STALE_MINUTES,
+)
+from db_pool import ConnectionPool
+from db_schema import INDEXES
+from llm_metrics import LatencyHistogram, LLMCallRecord, LLMMetrics
+from memory_cache import MemoryCache
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("twinailz.log"), logging.StreamHandler()],
+    handlers=[logging.FileHandler("twinailz.log", delay=True), logging.StreamHandler()],
 )
 logger = logging.getLogger("TwiNailz")
 
@@ -36,8 +49,12 @@ class APIResponse:
 class DatabaseManager:
     """Advanced SQLite database operations with connection pooling"""
 
-    def __init__(self, db_path: str = DATABASE_URL):
+    def __init__(self, db_path: str = DATABASE_URL, max_workers: int = 4):
         self.db_path = db_path
+        # sqlite3 blocks, so queries run on a bounded pool of worker
+        # threads, each with its own pooled connection
+        self.pool = ConnectionPool(db_path)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
         self._init_tables()
 
     def _init_tables(self):
@@ -129,42 +146,109 @@ class DatabaseManager:
             """
             )
 
+            # Per-user history lookups
+            cursor.execute(INDEXES["interactions"])
+
             conn.commit()
             logger.info("Database tables initialized successfully")
 
+    async def _run(self, fn, *args) -> Any:
+        """Run a blocking call on the database thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Enable column access by name
+        return conn
+
     @asynccontextmanager
     async def get_connection(self):
-        """Async context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Enable column access by name
+        """Async context manager for a dedicated connection.
+
+        Calls on the yielded connection block; run them through _run.
+        """
+        conn = await self._run(self._connect)
         try:
             yield conn
         finally:
-            conn.close()
+            await self._run(conn.close)
+
+    def _execute(self, query: str, params: tuple, fetch: Optional[str]) -> Any:
+        conn = self.pool.connection()
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(query, params)
+            if fetch == "one":
+                result = cursor.fetchone()
+            elif fetch == "all":
+                result = cursor.fetchall()
+            else:
+                result = cursor.rowcount
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _execute_many(self, query: str, rows: list) -> int:
+        conn = self.pool.connection()
+        try:
+            cursor = conn.executemany(query, rows)
+            conn.commit()
+            return cursor.rowcount
+        except Exception:
+            conn.rollback()
+            raise
 
     async def execute_query(
         self, query: str, params: tuple = (), fetch: str = None
     ) -> Any:
         """Execute database query with error handling"""
         try:
-            async with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(query, params)
-
-                if fetch == "one":
-                    result = cursor.fetchone()
-                elif fetch == "all":
-                    result = cursor.fetchall()
-                else:
-                    result = cursor.rowcount
-
-                conn.commit()
-                return result
+            return await self._run(self._execute, query, params, fetch)
         except Exception as e:
             logger.error(f"Database query error: {e}")
             await self.log_error("DATABASE_ERROR", str(e), query)
             return None
 
+    async def execute_many(self, query: str, rows: Iterable[tuple]) -> Optional[int]:
+        """Run one statement for every parameter tuple in a single transaction"""
+        try:
+            return await self._run(self._execute_many, query, list(rows))
+        except Exception as e:
+            logger.error(f"Database batch error: {e}")
+            await self.log_error("DATABASE_ERROR", str(e), query)
+            return None
+
+    async def iter_chunks(
+        self, query: str, params: tuple = (), chunk_size: int = 500
+    ) -> AsyncIterator[List[sqlite3.Row]]:
+        """Stream a result set as lists of at most chunk_size rows.
+
+        Only one chunk is held in memory at a time, so exports and
+        analytics jobs can walk tables of any size.
+        """
+        async with self.get_connection() as conn:
+            cursor = await self._run(conn.execute, query, params)
+            while True:
+                rows = await self._run(cursor.fetchmany, chunk_size)
+                if not rows:
+                    return
+                yield rows
+
+    async def iter_rows(
+        self, query: str, params: tuple = (), batch_size: int = 500
+    ) -> AsyncIterator[sqlite3.Row]:
+        """Stream rows, fetching batch_size at a time off the event loop"""
+        async for rows in self.iter_chunks(query, params, batch_size):
+            for row in rows:
+                yield row
+
+    def close(self):
+        """Stop the worker threads and close their connections"""
+        self.executor.shutdown(wait=True)
+        self.pool.close_all()
+
     async def log_error(
         self, error_type: str, message: str, context: str = None, user_id: int = None
     ):
@@ -176,168 +260,471 @@ class DatabaseManager:
         await self.execute_query(query, (error_type, message, context, user_id))
 
 
-class CacheManager:
-    """In-memory and persistent caching system"""
+# Upper bounds in seconds for cache get/set latency
+CACHE_LATENCY_BUCKETS = [
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, float("inf"),
+]
 
-    def __init__(self, cache_dir: str = "cache/"):
-        self.cache_dir = cache_dir
-        self.memory_cache = {}
-        self.cache_ttl = {}
-        os.makedirs(cache_dir, exist_ok=True)
 
-    def _get_cache_key(self, key: str) -> str:
-        """Generate cache key hash"""
-        return hashlib.md5(key.encode()).hexdigest()
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale_hits: int = 0
+    early_refreshes: int = 0
+    evictions: int = 0
+    get_latency: LatencyHistogram = field(
+        default_factory=lambda: LatencyHistogram(CACHE_LATENCY_BUCKETS)
+    )
+    set_latency: LatencyHistogram = field(
+        default_factory=lambda: LatencyHistogram(CACHE_LATENCY_BUCKETS)
+    )
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / lookups if lookups else 0.0
+
 
-    def set(self, key: str, data: Any, ttl_minutes: int = 60):
+class CacheManager:
+    """In-memory and persistent caching system.
+
+    Keys live in namespaces ("trends", "llm", "profiles", ...) that share
+    both tiers but keep separate hit, eviction, size and latency stats.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "cache/",
+        max_bytes: int = 64 * 1024 * 1024,
+        memory_entries: int = 10000,
+        policy: str = "lru",
+    ):
+        self.cache_dir = cache_dir
+        # Bounded memory tier; policy is "lru", "lfu" or "tinylfu"
+        self.memory = MemoryCache(memory_entries, policy)
+        self.memory.on_evict = self._record_evictions
+        os.makedirs(cache_dir, exist_ok=True)
+        # One indexed SQLite file instead of a pickle file per key
+        self.store = PersistentCacheStore(os.path.join(cache_dir, "cache.db"), max_bytes)
+        self.store.on_evict = self._record_evictions
+        self._expiry_task = None
+        # One computation per key at a time, shared by every waiter
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.namespace_stats: Dict[str, CacheStats] = {}
+
+    def _get_cache_key(self, key: str, namespace: str = "default") -> str:
+        """Generate cache key hash, prefixed with its namespace"""
+        return f"{namespace}:{hashlib.md5(key.encode()).hexdigest()}"
+
+    def _stats(self, namespace: str) -> CacheStats:
+        return self.namespace_stats.setdefault(namespace, CacheStats())
+
+    def _record_evictions(self, cache_keys: List[str]):
+        for cache_key in cache_keys:
+            self._stats(cache_key.split(":", 1)[0]).evictions += 1
+
+    def set(self, key: str, data: Any, ttl_minutes: int = 60, namespace: str = "default"):
         """Set cache with TTL"""
-        cache_key = self._get_cache_key(key)
+        self.set_many({key: data}, ttl_minutes, namespace)
+
+    def set_many(self, items: Dict[str, Any], ttl_minutes: int = 60, namespace: str = "default"):
+        """Set several entries with one TTL in a single persistent write"""
+        started = time.perf_counter()
+        expires = time.time() + ttl_minutes * 60
+        hashed = [(self._get_cache_key(key, namespace), data) for key, data in items.items()]
 
         # Memory cache
-        self.memory_cache[cache_key] = data
-        self.cache_ttl[cache_key] = datetime.now() + timedelta(minutes=ttl_minutes)
+        for cache_key, data in hashed:
+            self._memory_set(cache_key, data, expires)
 
         # Persistent cache
-        cache_file = os.path.join(self.cache_dir, f"{cache_key}.pkl")
         try:
-            with open(cache_file, "wb") as f:
-                pickle.dump({"data": data, "expires": self.cache_ttl[cache_key]}, f)
+            self.store.set_many(hashed, expires)
         except Exception as e:
             logger.warning(f"Failed to write persistent cache: {e}")
+        self._stats(namespace).set_latency.observe(time.perf_counter() - started)
 
-    def get(self, key: str) -> Optional[Any]:
+    def get(self, key: str, namespace: str = "default") -> Optional[Any]:
         """Get cached data"""
-        cache_key = self._get_cache_key(key)
-
-        # Check memory cache first
-        if cache_key in self.memory_cache:
-            if datetime.now() < self.cache_ttl.get(cache_key, datetime.now()):
-                return self.memory_cache[cache_key]
-            else:
-                # Expired - remove from memory
-                del self.memory_cache[cache_key]
-                del self.cache_ttl[cache_key]
+        return self.get_many([key], namespace).get(key)
+
+    def get_many(self, keys: List[str], namespace: str = "default") -> Dict[str, Any]:
+        """Get several entries; memory misses are fetched in one query"""
+        started = time.perf_counter()
+        now = time.time()
+        found = {}
+        missing = {}
+        for key in keys:
+            cache_key = self._get_cache_key(key, namespace)
+
+            # Check memory cache first
+            entry = self.memory.get_entry(cache_key, now)
+            if entry is not None:
+                found[key] = entry[0]
+                continue
+            missing[cache_key] = key
 
         # Check persistent cache
-        cache_file = os.path.join(self.cache_dir, f"{cache_key}.pkl")
-        if os.path.exists(cache_file):
+        if missing:
             try:
-                with open(cache_file, "rb") as f:
-                    cached = pickle.load(f)
-                    if datetime.now() < cached["expires"]:
-                        # Restore to memory cache
-                        self.memory_cache[cache_key] = cached["data"]
-                        self.cache_ttl[cache_key] = cached["expires"]
-                        return cached["data"]
-                    else:
-                        # Expired - remove file
-                        os.remove(cache_file)
+                stored = self.store.get_many(missing)
             except Exception as e:
                 logger.warning(f"Failed to read persistent cache: {e}")
+                stored = {}
+            for cache_key, (data, expires) in stored.items():
+                # Restore to memory cache
+                self._memory_set(cache_key, data, expires)
+                found[missing[cache_key]] = data
+
+        stats = self._stats(namespace)
+        stats.hits += len(found)
+        stats.misses += len(keys) - len(found)
+        stats.get_latency.observe(time.perf_counter() - started)
+        return found
+
+    async def _load(self, cache_key: str, stats: CacheStats) -> Optional[Any]:
+        """Memory first, then the persistent tier off the event loop"""
+        started = time.perf_counter()
+        entry = self.memory.get_entry(cache_key)
+        if entry is not None:
+            stats.get_latency.observe(time.perf_counter() - started)
+            return entry[0]
+        try:
+            stored = await asyncio.to_thread(self.store.get_many, [cache_key])
+        except Exception as e:
+            logger.warning(f"Failed to read persistent cache: {e}")
+            return None
+        stats.get_latency.observe(time.perf_counter() - started)
+        if cache_key not in stored:
+            return None
+        data, expires = stored[cache_key]
+        self._memory_set(cache_key, data, expires)
+        return data
+
+    async def _compute(
+        self,
+        cache_key: str,
+        stats: CacheStats,
+        coro_factory: Callable[[], Awaitable[Any]],
+        ttl_minutes: float,
+        stale_minutes: float,
+    ) -> Any:
+        started = time.monotonic()
+        value = await coro_factory()
+        # fresh_until and the compute time drive early refresh; the entry
+        # itself lives on through the stale window
+        entry = {
+            "value": value,
+            "fresh_until": time.time() + ttl_minutes * 60,
+            "delta": time.monotonic() - started,
+        }
+        expires = entry["fresh_until"] + stale_minutes * 60
+        write_started = time.perf_counter()
+        self._memory_set(cache_key, entry, expires)
+        try:
+            await asyncio.to_thread(self.store.set_many, [(cache_key, entry)], expires)
+        except Exception as e:
+            logger.warning(f"Failed to write persistent cache: {e}")
+        stats.set_latency.observe(time.perf_counter() - write_started)
+        return value
+
+    def _refresh(self, cache_key: str, *compute_args) -> asyncio.Task:
+        """Start computing cache_key unless a computation is already running"""
+        task = self._in_flight.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(self._compute(cache_key, *compute_args))
+            self._in_flight[cache_key] = task
+
+            def done(finished: asyncio.Task):
+                if self._in_flight.get(cache_key) is finished:
+                    del self._in_flight[cache_key]
+                if not finished.cancelled() and finished.exception():
+                    logger.warning(f"Cache refresh failed: {finished.exception()!r}")
+
+            task.add_done_callback(done)
+        return task
+
+    async def get_or_compute(
+        self,
+        key: str,
+        coro_factory: Callable[[], Awaitable[Any]],
+        ttl_minutes: float = 60,
+        stale_minutes: float = 0,
+        beta: float = 1.0,
+        namespace: str = "default",
+    ) -> Any:
+        """Return the cached value for key, computing it at most once at a time.
+
+        Fresh values may be refreshed early in the background, with a
+        probability that rises as expiry nears (scaled by beta and how long
+        the last computation took). For stale_minutes after expiry the old
+        value is still served while one background task recomputes it.
+        """
+        cache_key = self._get_cache_key(key, namespace)
+        stats = self._stats(namespace)
+        compute_args = (stats, coro_factory, ttl_minutes, stale_minutes)
+        entry = await self._load(cache_key, stats)
+        if isinstance(entry, dict) and "fresh_until" in entry:
+            remaining = entry["fresh_until"] - time.time()
+            if remaining > 0:
+                stats.hits += 1
+                if remaining <= -entry["delta"] * beta * math.log(1.0 - random.random()):
+                    stats.early_refreshes += 1
+                    self._refresh(cache_key, *compute_args)
+            else:
+                stats.stale_hits += 1
+                self._refresh(cache_key, *compute_args)
+            return entry["value"]
 
-        return None
+        stats.misses += 1
+        # shield: a cancelled caller must not cancel the shared computation
+        return await asyncio.shield(self._refresh(cache_key, *compute_args))
+
+    def _memory_set(self, cache_key: str, data: Any, expires: float):
+        """Put data in the memory tier, sized as the persistent tier would store it"""
+        try:
+            size = len(cache_key) + len(encode(data))
+        except (TypeError, ValueError):
+            size = len(cache_key) + len(repr(data))
+        self.memory.set(cache_key, data, expires, size)
+
+    def _memory_usage(self) -> Dict[str, Tuple[int, int]]:
+        """(entries, bytes) per namespace in the memory tier"""
+        usage: Dict[str, Tuple[int, int]] = {}
+        for cache_key, size in self.memory.sizes.items():
+            namespace = cache_key.split(":", 1)[0]
+            entries, total = usage.get(namespace, (0, 0))
+            usage[namespace] = (entries + 1, total + size)
+        return usage
+
+    async def summary(self) -> Dict:
+        """Per-namespace counters, sizes and latency for sizing the cache.
+
+        Covers this manager's namespaces only; the similarity and structured
+        recommendation caches keep their own stats (PerformanceMonitor
+        reports them next to this summary).
+        """
+        memory = self._memory_usage()
+        try:
+            # A GROUP BY over the cache file; keep it off the event loop
+            stored = await asyncio.to_thread(self.store.namespace_usage)
+        except Exception as e:
+            logger.warning(f"Failed to read persistent cache usage: {e}")
+            stored = {}
+
+        namespaces = {}
+        for namespace in sorted(set(self.namespace_stats) | set(memory) | set(stored)):
+            stats = self._stats(namespace)
+            memory_entries, memory_bytes = memory.get(namespace, (0, 0))
+            entries, size = stored.get(namespace, (0, 0))
+            namespaces[namespace] = {
+                "hits": stats.hits,
+                "misses": stats.misses,
+                "stale_hits": stats.stale_hits,
+                "early_refreshes": stats.early_refreshes,
+                "evictions": stats.evictions,
+                "hit_ratio": stats.hit_ratio,
+                "memory_entries": memory_entries,
+                "memory_bytes": memory_bytes,
+                "stored_entries": entries,
+                "stored_bytes": size,
+                "get_latency": stats.get_latency.summary(),
+                "set_latency": stats.set_latency.summary(),
+            }
+        return {
+            "policy": self.memory.policy_name,
+            "memory_entries": len(self.memory),
+            "memory_max_entries": self.memory.max_entries,
+            "memory_bytes": self.memory.bytes,
+            "stored_bytes": self.store.total_bytes,
+            "stored_max_bytes": self.store.max_bytes,
+            "namespaces": namespaces,
+        }
 
     def clear_expired(self):
         """Clear expired cache entries"""
-        now = datetime.now()
-        expired_keys = [k for k, ttl in self.cache_ttl.items() if now >= ttl]
+        # Both tiers find due entries by expiry order, not by scanning keys
+        self.memory.expire()
+        self._purge_store()
+
+    def _purge_store(self):
+        # Expired rows are found through the expiry index
+        try:
+            self.store.purge_expired()
+        except Exception as e:
+            logger.warning(f"Failed to purge persistent cache: {e}")
+
+    async def _expiry_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.memory.expire()
+            # The SQLite delete must not block the event loop
+            await asyncio.to_thread(self._purge_store)
+
+    def start_expiry(self, interval: float = 1.0):
+        """Clear expired entries from a background task on the running loop"""
+        if self._expiry_task is None:
+            self._expiry_task = asyncio.create_task(self._expiry_loop(interval))
+
+    async def stop_expiry(self):
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            try:
+                await self._expiry_task
+            except asyncio.CancelledError:
+                pass
+            self._expiry_task = None
+
+    def close(self):
+        self.store.close()
+
+
+def parse_nail_pro(content: bytes) -> List[Dict]:
+    """Extract trends from a NailPro page"""
+    soup = BeautifulSoup(content, "html.parser")
+
+    trends = []
+    # Example scraping logic (adjust based on actual site structure)
+    trend_articles = soup.find_all("article", class_="trend-item")[:5]
+
+    for article in trend_articles:
+        title = article.find("h2")
+        description = article.find("p")
+
+        if title and description:
+            trends.append(
+                {
+                    "title": title.get_text().strip(),
+                    "description": description.get_text().strip()[:200],
+                    "source": "NailPro",
+                    "scraped_at": datetime.now().isoformat(),
+                }
+            )
+
+    return trends
+
+
+def parse_allure(content: bytes) -> List[Dict]:
+    """Extract nail trends from an Allure page"""
+    soup = BeautifulSoup(content, "html.parser")
 
-        for key in expired_keys:
-            if key in self.memory_cache:
-                del self.memory_cache[key]
-            del self.cache_ttl[key]
+    trends = []
+    # Example scraping logic
+    articles = soup.find_all("div", class_="summary-item")[:3]
 
-            # Remove persistent cache file
-            cache_file = os.path.join(self.cache_dir, f"{key}.pkl")
-            if os.path.exists(cache_file):
-                try:
-                    os.remove(cache_file)
-                except Exception as e:
-                    logger.warning(f"Failed to remove expired cache file: {e}")
+    for article in articles:
+        title = article.find("h3")
+        if title:
+            trends.append(
+                {
+                    "title": title.get_text().strip(),
+                    "source": "Allure",
+                    "scraped_at": datetime.now().isoformat(),
+                }
+            )
+
+    return trends
+
+
+@dataclass
+class TrendSource:
+    url: str
+    parse: Callable[[bytes], List[Dict]]
+    timeout: float = 10.0
+
+
+TREND_SOURCES = {
+    "nailpro": TrendSource("https://www.nailpro.com/trends", parse_nail_pro),
+    "allure": TrendSource("https://www.allure.com/topic/nails", parse_allure),
+}
 
 
 class TrendScraper:
     """Web scraping for beauty trends from various sources"""
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(
-            {"User-Agent": "TwiNailz-Bot/1.0 (Beauty Trend Analysis)"}
-        )
+    def __init__(
+        self,
+        cache: CacheManager = None,
+        sources: Dict[str, TrendSource] = None,
+        max_concurrency: int = 8,
+        limit_per_host: int = 2,
+    ):
+        self.cache = cache or CacheManager(CACHE_DIR)
+        self.sources = sources or TREND_SOURCES
+        self.max_concurrency = max_concurrency
+        self.limit_per_host = limit_per_host
+        # Sources are fetched concurrently, at most this many at a time
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared keep-alive session, created on first use inside the loop"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": "TwiNailz-Bot/1.0 (Beauty Trend Analysis)"},
+            )
+        return self.session
 
-    async def scrape_nail_pro(self) -> List[Dict]:
-        """Scrape trends from NailPro.com"""
+    async def scrape_source(self, name: str) -> List[Dict]:
+        """Fetch and parse one source; failures and timeouts yield no trends"""
+        source = self.sources[name]
         try:
-            response = self.session.get("https://www.nailpro.com/trends", timeout=10)
-            soup = BeautifulSoup(response.content, "html.parser")
-
-            trends = []
-            # Example scraping logic (adjust based on actual site structure)
-            trend_articles = soup.find_all("article", class_="trend-item")[:5]
-
-            for article in trend_articles:
-                title = article.find("h2")
-                description = article.find("p")
-
-                if title and description:
-                    trends.append(
-                        {
-                            "title": title.get_text().strip(),
-                            "description": description.get_text().strip()[:200],
-                            "source": "NailPro",
-                            "scraped_at": datetime.now().isoformat(),
-                        }
-                    )
-
-            return trends
-
+            async with self.semaphore:
+                async with self._get_session().get(
+                    source.url, timeout=aiohttp.ClientTimeout(total=source.timeout)
+                ) as response:
+                    response.raise_for_status()
+                    content = await response.read()
+            # HTML parsing is CPU work; keep it off the event loop
+            return await asyncio.to_thread(source.parse, content)
+        except asyncio.TimeoutError:
+            logger.error(f"{name} scraping timed out after {source.timeout}s")
+            return []
         except Exception as e:
-            logger.error(f"NailPro scraping error: {e}")
+            logger.error(f"{name} scraping error: {e}")
             return []
 
+    async def scrape_nail_pro(self) -> List[Dict]:
+        """Scrape trends from NailPro.com"""
+        return await self.scrape_source("nailpro")
+
     async def scrape_allure_nails(self) -> List[Dict]:
         """Scrape nail trends from Allure"""
-        try:
-            response = self.session.get(
-                "https://www.allure.com/topic/nails", timeout=10
-            )
-            soup = BeautifulSoup(response.content, "html.parser")
-
-            trends = []
-            # Example scraping logic
-            articles = soup.find_all("div", class_="summary-item")[:3]
-
-            for article in articles:
-                title = article.find("h3")
-                if title:
-                    trends.append(
-                        {
-                            "title": title.get_text().strip(),
-                            "source": "Allure",
-                            "scraped_at": datetime.now().isoformat(),
-                        }
-                    )
-
-            return trends
-
-        except Exception as e:
-            logger.error(f"Allure scraping error: {e}")
-            return []
+        return await self.scrape_source("allure")
 
     async def get_all_trends(self) -> Dict[str, List]:
-        """Aggregate trends from all sources"""
-        tasks = [self.scrape_nail_pro(), self.scrape_allure_nails()]
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        """Aggregate trends from all sources, scraping at most once per TTL"""
+        return await self.cache.get_or_compute(
+            "scraped",
+            self._scrape_all_trends,
+            TRENDS_CACHE_TTL_MINUTES,
+            TRENDS_STALE_MINUTES,
+            namespace="trends",
+        )
 
-        aggregated = {
-            "nailpro": results[0] if not isinstance(results[0], Exception) else [],
-            "allure": results[1] if not isinstance(results[1], Exception) else [],
-            "last_updated": datetime.now().isoformat(),
-        }
+    async def _scrape_all_trends(self) -> Dict[str, List]:
+        # Total latency is the slowest source, not the sum of all of them
+        names = list(self.sources)
+        results = await asyncio.gather(*(self.scrape_source(name) for name in names))
 
+        aggregated = dict(zip(names, results))
+        aggregated["last_updated"] = datetime.now().isoformat()
         return aggregated
 
+    async def close(self):
+        """Close HTTP session"""
+        if self.session is not None:
+            await self.session.close()
+
 
 class APIIntegration:
     """External API integrations and management"""
@@ -379,23 +766,51 @@ class APIIntegration:
 class PerformanceMonitor:
     """System performance monitoring and analytics"""
 
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        analytics_batch_size: int = 100,
+        cache: CacheManager = None,
+    ):
         self.db = db_manager
+        # Optional CacheManager whose per-namespace stats are reported
+        self.cache = cache
+        # Analytics rows are written in batches through execute_many
+        self.analytics_batch_size = analytics_batch_size
+        self.pending_analytics: List[tuple] = []
         self.metrics = {
             "requests_per_minute": [],
             "response_times": [],
             "error_counts": {},
             "user_satisfaction": [],
         }
+        self.llm = LLMMetrics()
+        # Named stats() callables of other components, reported alongside "llm"
+        self.components: Dict[str, Callable[[], Dict]] = {}
+
+    def register_stats(self, name: str, stats_fn: Callable[[], Dict]):
+        """Report a component's stats() under name in get_system_health"""
+        self.components[name] = stats_fn
 
     async def track_request(self, processing_time: float):
         """Track request processing time"""
         self.metrics["response_times"].append(processing_time)
 
         # Store in database for historical analysis
-        await self.db.execute_query(
-            "INSERT INTO analytics (metric_name, metric_value) VALUES (?, ?)",
-            ("response_time", processing_time),
+        await self._record_analytic("response_time", processing_time)
+
+    async def _record_analytic(self, metric_name: str, value: float):
+        self.pending_analytics.append((metric_name, value))
+        if len(self.pending_analytics) >= self.analytics_batch_size:
+            await self.flush_analytics()
+
+    async def flush_analytics(self):
+        """Write buffered analytics rows in one batch"""
+        if not self.pending_analytics:
+            return
+        rows, self.pending_analytics = self.pending_analytics, []
+        await self.db.execute_many(
+            "INSERT INTO analytics (metric_name, metric_value) VALUES (?, ?)", rows
         )
 
     async def track_error(self, error_type: str):
@@ -408,10 +823,13 @@ class PerformanceMonitor:
         """Track user satisfaction ratings"""
         self.metrics["user_satisfaction"].append(rating)
 
-        await self.db.execute_query(
-            "INSERT INTO analytics (metric_name, metric_value) VALUES (?, ?)",
-            ("user_rating", rating),
-        )
+        await self._record_analytic("user_rating", rating)
+
+    async def track_llm_call(self, record: LLMCallRecord):
+        """Track an LLM call's latency, token usage and cost per handler"""
+        self.llm.record(record)
+        if record.outcome == "error":
+            await self.track_error(f"LLM_{record.handler}")
 
     async def get_system_health(self) -> Dict:
         """Get system health metrics"""
@@ -431,4 +849,7 @@ class PerformanceMonitor:
                 else 0
             ),
             "total_requests": len(self.metrics["response_times"]),
+            "llm": self.llm.summary(),
+            "cache": await self.cache.summary() if self.cache else {},
+            **{name: stats_fn() for name, stats_fn in self.components.items()},
         }